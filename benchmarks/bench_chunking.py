@@ -0,0 +1,66 @@
+"""
+Times token-window chunking of extracted paper text: the decode-based
+chunker LitScanner used to have, the offset-based `chunking.chunk_text`,
+and `chunking.chunk_texts`, which tokenizes all papers with `encode_batch`.
+
+Usage:
+    python benchmarks/bench_chunking.py pdfs/*.txt --chunk-size 2048 --overlap 256
+"""
+import argparse
+import os
+import sys
+from time import perf_counter
+
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'relevancy'))
+
+from chunking import chunk_text, chunk_texts, get_tokenizer
+
+def decode_chunks(text, chunk_size, overlap):
+    """The previous implementation: re-tokenize, then decode every window."""
+    tokenizer = get_tokenizer()
+    tokens = tokenizer.encode(text)
+    chunks, start = [], 0
+    while start < len(tokens):
+        chunks.append(tokenizer.decode(tokens[start:start + chunk_size]))
+        start += chunk_size - overlap
+    return chunks
+
+def best_of(repeat, fn):
+    times = []
+    for _ in range(repeat):
+        start = perf_counter()
+        result = fn()
+        times.append(perf_counter() - start)
+    return min(times), result
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Benchmark token-window chunking.')
+    parser.add_argument('texts', nargs='+', help='Extracted paper text files')
+    parser.add_argument('--chunk-size', type=int, default=2048)
+    parser.add_argument('--overlap', type=int, default=256)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--threads', type=int, default=8)
+    args = parser.parse_args()
+
+    texts = []
+    for path in args.texts:
+        with open(path, encoding='utf8', errors='replace') as f:
+            texts.append(f.read())
+    n_tokens = sum(len(tokens) for tokens in get_tokenizer().encode_batch(texts))
+    print(f'{len(texts)} papers, {sum(map(len, texts))} characters, {n_tokens} tokens')
+
+    # build the cached tokenizer tables outside the timings
+    chunk_text(texts[0], args.chunk_size, args.overlap)
+
+    runs = [
+        ('decode', lambda: [decode_chunks(t, args.chunk_size, args.overlap) for t in texts]),
+        ('offsets', lambda: [chunk_text(t, args.chunk_size, args.overlap) for t in texts]),
+        ('encode_batch', lambda: chunk_texts(texts, args.chunk_size, args.overlap,
+                                             num_threads=args.threads)),
+    ]
+    baseline = None
+    for name, fn in runs:
+        seconds, chunks = best_of(args.repeat, fn)
+        baseline = baseline or seconds
+        print(f'{name:>12}: {seconds * 1000:8.1f} ms  {n_tokens / seconds / 1e6:6.2f}M tokens/s  '
+              f'{baseline / seconds:5.2f}x  ({sum(map(len, chunks))} chunks)')
@@ -0,0 +1,32 @@
+"""
+Measures bulk PDF text extraction throughput with `BulkPDFExtractor` for a
+range of worker counts, in pages and PDFs per second, overall and per core.
+Sidecars are written to a temporary directory that is removed afterwards.
+
+Usage:
+    python benchmarks/bench_extraction.py papers --workers 1 2 4 8
+"""
+import argparse
+import os
+import sys
+import tempfile
+
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'relevancy'))
+
+from PDFSummarizer import BulkPDFExtractor
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Benchmark bulk PDF text extraction.')
+    parser.add_argument('directory', type=str, help='Directory of PDFs')
+    parser.add_argument('--workers', nargs='+', type=int, default=[1, 2, 4, os.cpu_count()])
+    args = parser.parse_args()
+
+    print(f'{"workers":>7} {"pdfs":>6} {"pages":>7} {"seconds":>8} {"pages/s":>8} '
+          f'{"pdfs/s":>7} {"pages/s/core":>12} {"pdfs/s/core":>11}')
+    for workers in args.workers:
+        with tempfile.TemporaryDirectory() as outdir:
+            stats = BulkPDFExtractor(args.directory, None, outdir, workers=workers).process_pdfs()
+        seconds = stats['seconds'] or float('nan')
+        print(f'{workers:>7} {stats["pdfs"]:>6} {stats["pages"]:>7} {seconds:>8.2f} '
+              f'{stats["pages"] / seconds:>8.1f} {stats["pdfs"] / seconds:>7.2f} '
+              f'{stats["pages"] / seconds / workers:>12.1f} {stats["pdfs"] / seconds / workers:>11.2f}')
@@ -0,0 +1,61 @@
+"""
+Compares extracting a whole PDF and then chunking it against streaming its
+pages through `IncrementalChunker`: time until the first chunk is ready
+(when its LLM calls could start), total time, and peak Python memory as
+measured by tracemalloc.
+
+Usage:
+    python benchmarks/bench_streaming.py papers/supplement.pdf --chunk-size 2048 --overlap 256
+"""
+import argparse
+import os
+import sys
+from time import perf_counter
+import tracemalloc
+
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'relevancy'))
+
+from chunking import IncrementalChunker, chunk_text
+from extraction import iter_pages
+
+def whole(pdf, chunk_size, overlap):
+    content = ''
+    for page in iter_pages(pdf):
+        content += page
+    yield from chunk_text(content, chunk_size=chunk_size, overlap=overlap)
+
+def streamed(pdf, chunk_size, overlap):
+    chunker = IncrementalChunker(chunk_size=chunk_size, overlap=overlap)
+    for page in iter_pages(pdf):
+        yield from chunker.add(page)
+    yield from chunker.finish()
+
+def measure(chunks):
+    tracemalloc.start()
+    start = perf_counter()
+    first, n_chunks = None, 0
+    for _ in chunks:
+        if first is None:
+            first = perf_counter() - start
+        n_chunks += 1
+    seconds = perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return first or seconds, seconds, peak, n_chunks
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Benchmark streaming PDF chunking.')
+    parser.add_argument('pdfs', nargs='+', help='PDF files')
+    parser.add_argument('--chunk-size', type=int, default=2048*8)
+    parser.add_argument('--overlap', type=int, default=2048*4)
+    args = parser.parse_args()
+
+    # build the cached tokenizer tables outside the timings
+    chunk_text('warm up', args.chunk_size, args.overlap)
+
+    print(f'{"paper":>24} {"mode":>8} {"first chunk":>11} {"total":>8} {"peak MB":>8} {"chunks":>6}')
+    for pdf in args.pdfs:
+        for mode, chunks in (('whole', whole), ('streamed', streamed)):
+            first, seconds, peak, n_chunks = measure(chunks(pdf, args.chunk_size, args.overlap))
+            print(f'{os.path.basename(pdf)[-24:]:>24} {mode:>8} {first:>10.3f}s {seconds:>7.3f}s '
+                  f'{peak / 2**20:>8.1f} {n_chunks:>6}')
@@ -0,0 +1,44 @@
+"""
+Reports the token savings and recall of the BM25 prefilter against a
+labelled set of chunks, for a range of thresholds and top-k settings.
+
+The labelled set is a JSONL file with one paper per line:
+    {"chunks": ["...", "..."], "labels": [true, false]}
+where a label is true if a full LLM scan judged the chunk relevant.
+
+Usage:
+    python benchmarks/eval_prefilter.py labelled.jsonl \
+        --questions "Does this paper discuss specific residues of NMNAT2?" \
+        --synonyms NMNAT2 "nicotinamide mononucleotide adenylyltransferase 2"
+"""
+import argparse
+import json
+import os
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'relevancy'))
+
+from prefilter import BM25Prefilter
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Evaluate the BM25 chunk prefilter.')
+    parser.add_argument('labelled', type=str, help='JSONL file of labelled papers')
+    parser.add_argument('--questions', nargs='+', required=True)
+    parser.add_argument('--synonyms', nargs='*', default=[])
+    parser.add_argument('--thresholds', nargs='+', type=float, default=[0., 1., 2., 4., 8.])
+    parser.add_argument('--top-k', nargs='*', type=int, default=[1, 2, 3])
+    args = parser.parse_args()
+
+    with open(args.labelled) as f:
+        papers = [json.loads(line) for line in f if line.strip()]
+
+    settings = [('threshold', t, BM25Prefilter(args.synonyms, threshold=t)) for t in args.thresholds]
+    settings += [('top_k', k, BM25Prefilter(args.synonyms, top_k=k)) for k in args.top_k]
+
+    print(f'{"setting":>16} {"chunks kept":>12} {"tokens kept":>12} {"savings":>8} {"recall":>7}')
+    for name, value, prefilter in settings:
+        report = prefilter.evaluate(papers, args.questions)
+        print(f'{f"{name}={value:g}":>16} '
+              f'{report.get("chunks_kept", 0):>5}/{report["chunks"]:<6} '
+              f'{report.get("tokens_kept", 0):>12} '
+              f'{report["token_savings"]:>8.1%} {report["recall"]:>7.1%}')
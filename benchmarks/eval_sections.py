@@ -0,0 +1,41 @@
+"""
+Reports, per paper, how many tokens the section-aware chunker keeps and
+which sections it drops, for a set of local PDFs.
+
+Usage:
+    python benchmarks/eval_sections.py papers/*.pdf \
+        --sections front abstract introduction results discussion
+"""
+import argparse
+import os
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'relevancy'))
+
+import pymupdf
+from sections import DEFAULT_SECTIONS, SectionChunker
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Evaluate the section-aware chunker.')
+    parser.add_argument('pdfs', nargs='+', help='PDF files')
+    parser.add_argument('--sections', nargs='+', default=list(DEFAULT_SECTIONS))
+    parser.add_argument('--chunk-size', type=int, default=2048*8)
+    parser.add_argument('--overlap', type=int, default=2048*4)
+    args = parser.parse_args()
+
+    chunker = SectionChunker(sections=args.sections)
+    total, total_kept = 0, 0
+    print(f'{"paper":>24} {"tokens":>8} {"kept":>8} {"reduction":>9}  dropped sections')
+    for path in args.pdfs:
+        with pymupdf.open(path) as doc:
+            pages = [page.get_text() for page in doc]
+        _, report = chunker.chunk(pages, chunk_size=args.chunk_size, overlap=args.overlap)
+        total += report['tokens']
+        total_kept += report['tokens_kept']
+        reduction = 1 - report['tokens_kept'] / report['tokens'] if report['tokens'] else 0.
+        dropped = ', '.join(f'{name} ({tokens})' for name, tokens in report['dropped'].items())
+        print(f'{os.path.basename(path)[-24:]:>24} {report["tokens"]:>8} '
+              f'{report["tokens_kept"]:>8} {reduction:>9.1%}  {dropped}')
+
+    if total:
+        print(f'{"total":>24} {total:>8} {total_kept:>8} {1 - total_kept / total:>9.1%}')
@@ -1,6 +1,9 @@
 from configs import LLMConfig, LitScanConfig
 from datetime import datetime
 from litscan import Logger, PMCScanner
+from llm_cache import LLMCache
+from llm_client import ClientProvider
+from metrics import tag
 import os
 import pickle
 
@@ -34,19 +37,25 @@ lsconfig = LitScanConfig(
 
 os.makedirs(outdir, exist_ok=True)
 logger = Logger(config=llmconfig)
-scraper = PMCScanner(logger=logger, cfg=lsconfig, outdir=outdir)
+# completions are cached on disk so re-runs only pay for new questions
+provider = ClientProvider(cache=LLMCache(f'{outdir}/llm_cache.sqlite'))
+scraper = PMCScanner(logger=logger, cfg=lsconfig, outdir=outdir, 
+                     client_provider=provider)
 pmcids = scraper.get_ids(term)
-results = {}
-for pmcid in pmcids:
-    scraper.get_pdf(pmcid)
-    print(f'Is {pmcid} relevant?')
-    responses = []
-    score = 0
+# only download and fully scan papers whose abstracts look relevant
+pmcids = scraper.triage(pmcids, questions, weights)
 
-    results[pmcid] = scraper.is_pdf_relevant(f'{pmcid}.pdf', 
-                                             questions, 
-                                             weights)
+# papers, chunks and questions are all scored concurrently; PDFs are downloaded
+# into memory and only relevant ones are saved to outdir
+with tag(term=term):
+    results = scraper.scan_pmcids(pmcids, questions, weights)
+print(provider.cache)
 
 timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
 with open(f'{outdir}/responses_{timestamp}.pkl', 'wb') as f:
     pickle.dump(results, f)
+
+# token, latency and cost accounting per paper, question and run
+provider.metrics.write_report(f'{outdir}/llm_metrics_{timestamp}.json')
+provider.metrics.write_report(f'{outdir}/llm_calls_{timestamp}.csv')
+print(provider.metrics.totals())
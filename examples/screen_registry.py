@@ -0,0 +1,57 @@
+from configs import LLMConfig, LitScanConfig
+from datetime import datetime
+from litscan import Logger, PMCScanner
+from llm_cache import LLMCache
+from llm_client import ClientProvider
+from metrics import tag
+import os
+from packing import read_registry
+import pickle
+
+api_key = os.environ.get('OPENAI_API_KEY')
+term = 'NMNAT2'
+registry = '../publisher_crawlers/mvp_bioarxiv/registry/biorxiv_crawl_2.csv'
+outdir = 'registry_screen'
+questions = [
+    f'Does this paper discuss the {term} protein?',
+    f'Does this paper discuss one or more point mutants of {term} related to dysfunction?',
+    f'Does this paper discuss intrinsically disordered proteins or regions?'
+]
+weights = [3, 2, 1]
+
+llmconfig = LLMConfig(
+    api_key=api_key,
+    base_url=None, # let OpenAI client route this
+    model='gpt-4o-mini',
+    temperature=0.0, # be more deterministic
+    logfile='testing.log'
+)
+
+lsconfig = LitScanConfig(
+    openai_api_key=api_key,
+    openai_base_url=None,
+    openai_model='gpt-4o-mini',
+    packing_max_tokens=12000
+)
+
+os.makedirs(outdir, exist_ok=True)
+logger = Logger(config=llmconfig)
+provider = ClientProvider(cache=LLMCache(f'{outdir}/llm_cache.sqlite'))
+scanner = PMCScanner(logger=logger, cfg=lsconfig, outdir=outdir,
+                     client_provider=provider)
+
+# title and abstract of every row, keyed by DOI; many rows are packed into each call
+documents = read_registry(registry)
+with tag(term=term):
+    results = scanner.screen_documents(documents, questions, weights)
+
+relevant = {doi: result for doi, result in results.items()
+            if result and result['response'] != 'No response'}
+print(f'{len(relevant)}/{len(documents)} registry entries look relevant')
+
+timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+with open(f'{outdir}/registry_responses_{timestamp}.pkl', 'wb') as f:
+    pickle.dump(results, f)
+
+provider.metrics.write_report(f'{outdir}/llm_metrics_{timestamp}.json')
+print(provider.metrics.totals())
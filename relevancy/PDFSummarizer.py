@@ -1,9 +1,14 @@
+from chunking import chunk_text, get_tokenizer
+from concurrent.futures import ProcessPoolExecutor
 from configs import LLMConfig
-from openai import OpenAI
+from extraction import TextCache, extract_pages
+from llm_client import ClientProvider, default_provider
+import logging
+from metrics import tag
+import os
 from pathlib import Path
-import pymupdf
-import tiktoken
-from typing import List, Union
+from time import perf_counter
+from typing import Dict, List, Union
 
 PathLike = Union[str, Path]
 FileLike = Union[str, Path, List[str]]
@@ -31,78 +36,61 @@ class PDFSummarizer:
         # Ask questions
         answer = summarizer.ask_question("What are the main findings?")
     """
-    def __init__(self, config: LLMConfig):
+    def __init__(self, config: LLMConfig, 
+                 client_provider: Union[ClientProvider, None]=None,
+                 text_cache: Union[TextCache, None]=None):
         self.config = config
-        self.client = OpenAI(
-            api_key=config.api_key,
-            base_url=config.base_url
-        )
+        self.text_cache = text_cache
+        self.client_provider = client_provider if client_provider is not None else default_provider()
         self.context = ""
         self.conversation_history = []
-        self.tokenizer = tiktoken.encoding_for_model("gpt-4o-mini")
+        self.tokenizer = get_tokenizer("gpt-4o-mini")
         self.max_chunk_tokens = 15000  # Adjust this based on your model's limits
         self.overlap_tokens = 5000     # Overlap between chunks to maintain context
 
+    @property
+    def client(self):
+        # kept for backward compatibility; requests go through `client_provider.complete`
+        return self.client_provider.client(self.config.api_key, self.config.base_url)
+
     def extract_text(self, pdf_path: str, save_text: bool = True) -> str:
-        """Extract text content from PDF file and assign to context."""
-        context = ''
-        doc = pymupdf.open(pdf_path)
-        txt_path = pdf_path.rsplit('.', 1)[0] + '.txt'
-        out = open(txt_path, 'wb') if save_text else None
-        for page in doc:
-            text = page.get_text()
-            context += text
-
-            if save_text:
-                out.write(text.encode('utf8'))
-                out.write(bytes((12,)))
+        """
+        Extract text content from PDF file and assign to context. With a
+        `text_cache`, a PDF that was extracted before is not parsed again.
+        """
+        pages = extract_pages(pdf_path, self.text_cache)
+        self.context = ''.join(pages)
 
-        self.context = context
-        
         if save_text:
-            out.close()
+            write_sidecar(pdf_path.rsplit('.', 1)[0] + '.txt', pages)
 
-        return context
+        return self.context
 
     def _chunk_text(self, text: str) -> list[str]:
         """Split text into overlapping chunks based on token count"""
-        chunks = []
-        tokens = self.tokenizer.encode(text)
-
-        start = 0
-        while start < len(tokens):
-            # Get chunk of tokens
-            end = start + self.max_chunk_tokens
-            chunk_tokens = tokens[start:end]
-
-            # Convert chunk tokens back to text
-            chunk_text = self.tokenizer.decode(chunk_tokens)
-            chunks.append(chunk_text)
-
-            # Move start position, accounting for overlap
-            start = end - self.overlap_tokens
-
-        return chunks
+        return chunk_text(text, chunk_size=self.max_chunk_tokens,
+                          overlap=self.overlap_tokens, model="gpt-4o-mini")
 
     def summarize(self) -> str:
         """Generate summary of PDF content using chunks"""
         chunks = self._chunk_text(self.context)
         chunk_summaries = []
 
-        # Summarize each chunk
-        for i, chunk in enumerate(chunks):
-            prompt = f"Please summarize part {i+1} of {len(chunks)} of the text:\n\n{chunk}"
-            summary = self._get_completion(prompt)
-            chunk_summaries.append(summary)
-
-        # Combine chunk summaries
-        combined_summary = "\n\n".join(chunk_summaries)
-        if len(chunks) > 1:
-            # Create final summary of summaries
-            final_prompt = f"Please provide a coherent summary combining these section summaries:\n\n{combined_summary}"
-            final_summary = self._get_completion(final_prompt)
-        else:
-            final_summary = combined_summary
+        with tag(stage='summary'):
+            # Summarize each chunk
+            for i, chunk in enumerate(chunks):
+                prompt = f"Please summarize part {i+1} of {len(chunks)} of the text:\n\n{chunk}"
+                summary = self._get_completion(prompt)
+                chunk_summaries.append(summary)
+
+            # Combine chunk summaries
+            combined_summary = "\n\n".join(chunk_summaries)
+            if len(chunks) > 1:
+                # Create final summary of summaries
+                final_prompt = f"Please provide a coherent summary combining these section summaries:\n\n{combined_summary}"
+                final_summary = self._get_completion(final_prompt)
+            else:
+                final_summary = combined_summary
 
         # Update conversation history
         self.conversation_history.append({
@@ -121,19 +109,20 @@ class PDFSummarizer:
         chunks = self._chunk_text(self.context)
         chunk_responses = []
 
-        # Get response from each chunk
-        for chunk in chunks:
-            prompt = f"Given the following text:\n\n{chunk}\n\nPlease answer this question: {question}"
-            response = self._get_completion(prompt)
-            chunk_responses.append(response)
-
-        # Combine responses if multiple chunks
-        if len(chunks) > 1:
-            combined_responses = "\n\n".join(chunk_responses)
-            final_prompt = f"Please provide a coherent answer combining these responses to the question '{question}':\n\n{combined_responses}"
-            final_response = self._get_completion(final_prompt)
-        else:
-            final_response = chunk_responses[0]
+        with tag(stage='question', question=question):
+            # Get response from each chunk
+            for chunk in chunks:
+                prompt = f"Given the following text:\n\n{chunk}\n\nPlease answer this question: {question}"
+                response = self._get_completion(prompt)
+                chunk_responses.append(response)
+
+            # Combine responses if multiple chunks
+            if len(chunks) > 1:
+                combined_responses = "\n\n".join(chunk_responses)
+                final_prompt = f"Please provide a coherent answer combining these responses to the question '{question}':\n\n{combined_responses}"
+                final_response = self._get_completion(final_prompt)
+            else:
+                final_response = chunk_responses[0]
 
         # Update conversation history
         self.conversation_history.append({
@@ -154,7 +143,9 @@ class PDFSummarizer:
     def _get_completion(self, prompt: str) -> str:
         """Helper method to get LLM completion"""
         try:
-            response = self.client.chat.completions.create(
+            response = self.client_provider.complete(
+                self.config.api_key,
+                self.config.base_url,
                 model=self.config.model,
                 messages=[{"role": "user", "content": prompt}],
                 # max_tokens=self.config.max_tokens,
@@ -184,36 +175,139 @@ class PDFSummarizer:
 
         return output_path
 
-class BulkPDFExtractor:
+def write_sidecar(txt_path: str, pages: List[str]) -> None:
     """
-    For processing multiple PDF files at once for text extraction.
+    Writes page texts to a `.txt` sidecar, separated by form feeds. The text
+    is written to a temporary file that is renamed into place, so an
+    interrupted run never leaves a partial sidecar behind.
     """
-    def __init__(self, directory: PathLike, files: FileLike,
-                 output_directory: PathLike):
-        self.directory = directory
-        self.output_directory = output_directory
+    tmp_path = f'{txt_path}.{os.getpid()}.tmp'
+    try:
+        with open(tmp_path, 'wb') as out:
+            for text in pages:
+                out.write(text.encode('utf8'))
+                out.write(bytes((12,)))
+        os.replace(tmp_path, txt_path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
 
-        if isinstance(files, list):
-            _files = files
-        else:
-            _files = [line.strip() for line in open(files).readlines()]
+def extract_to_sidecar(pdf_path: str, txt_path: str,
+                       text_cache: Union[TextCache, None]=None) -> int:
+    """
+    Extracts the text of a PDF into a `.txt` sidecar, as
+    `PDFSummarizer.extract_text` does.
 
-        self.files = set(files)
+    Returns:
+        int: Number of pages extracted
+    """
+    pages = extract_pages(pdf_path, text_cache)
+    write_sidecar(txt_path, pages)
+    return len(pages)
 
-    def process_pdfs(self) -> None:
-        for pdf_file in self.directory.glob('*.pdf'):
-            name = pdb_file.name.strip('.pdf')
+class BulkPDFExtractor:
+    """
+    For processing multiple PDF files at once for text extraction. PDFs are
+    spread across a pool of `workers` processes (all cores by default) and
+    each is written to `output_directory/<name>.txt`. PDFs whose sidecar
+    already exists and is newer than the PDF are skipped unless `overwrite`
+    is set, and a `text_cache` shared with the scanners lets them reuse the
+    extracted text. Requested `files` with no PDF in `directory` are logged
+    and counted as missing.
 
-            if name in self.files:
-                print('Processing: {pdf_file}')
-                text = extract_pdf_text(pdf_file) # this currently comes from litscan.py
-                output_file = self.output_dir / name + '.txt'
+    Example usage:
+        extractor = BulkPDFExtractor('papers', None, 'papers_text', workers=8)
+        stats = extractor.process_pdfs()
+    """
+    def __init__(self, directory: PathLike, files: Union[FileLike, None],
+                 output_directory: PathLike, workers: Union[int, None]=None,
+                 overwrite: bool=False, text_cache: Union[TextCache, None]=None,
+                 logger: Union[logging.Logger, None]=None):
+        self.directory = Path(directory)
+        self.output_directory = Path(output_directory)
+        self.workers = workers if workers is not None else os.cpu_count()
+        self.overwrite = overwrite
+        self.text_cache = text_cache
+        self.logger = logger if logger is not None else logging.getLogger('litscan')
+
+        if files is None: # every PDF in the directory
+            self.files = None
+        else:
+            if isinstance(files, list):
+                _files = files
+            else:
+                _files = [line.strip() for line in open(files).readlines()]
+
+            self.files = {Path(f).stem if f.endswith('.pdf') else f for f in _files if f}
+
+    def pending(self) -> List[Path]:
+        """PDFs in `directory` that still need extracting."""
+        pdfs = []
+        for pdf_file in sorted(self.directory.glob('*.pdf')):
+            if self.files is not None and pdf_file.stem not in self.files:
+                continue
+
+            txt_file = self.output_directory / f'{pdf_file.stem}.txt'
+            if (not self.overwrite and txt_file.exists()
+                    and txt_file.stat().st_mtime >= pdf_file.stat().st_mtime):
+                continue
+            pdfs.append(pdf_file)
+        return pdfs
+
+    def process_pdfs(self) -> Dict[str, float]:
+        """
+        Extracts every pending PDF.
+
+        Returns:
+            dict: Counts of 'pdfs' extracted, 'pages', PDFs 'skipped' as up to
+                  date, requested files 'missing' from `directory`, 'failed'
+                  PDFs, and the wall-clock 'seconds' taken
+        """
+        os.makedirs(self.output_directory, exist_ok=True)
+        pdfs = self.pending()
+        available = {pdf.stem for pdf in self.directory.glob('*.pdf')}
+        missing = sorted(self.files - available) if self.files is not None else []
+        n_selected = len(available) if self.files is None else len(self.files) - len(missing)
+        stats = {'pdfs': 0, 'pages': 0, 'skipped': n_selected - len(pdfs),
+                 'missing': len(missing), 'failed': 0, 'seconds': 0.}
+        if missing:
+            self.logger.warn(f'{len(missing)} requested PDFs not found in {self.directory}: '
+                             f'{", ".join(missing[:10])}{" ..." if len(missing) > 10 else ""}')
+
+        start = perf_counter()
+        jobs = [(str(pdf), str(self.output_directory / f'{pdf.stem}.txt'), self.text_cache)
+                for pdf in pdfs]
+        if self.workers <= 1 or len(jobs) <= 1:
+            results = [self._extract(job) for job in jobs]
+        else:
+            with ProcessPoolExecutor(max_workers=self.workers) as pool:
+                chunksize = max(1, len(jobs) // (4 * self.workers))
+                results = list(pool.map(self._extract, jobs, chunksize=chunksize))
 
-                with open(str(output_file, 'w')) as f:
-                    f.write(text)
+        for n_pages in results:
+            if n_pages is None:
+                stats['failed'] += 1
+            else:
+                stats['pdfs'] += 1
+                stats['pages'] += n_pages
+        stats['seconds'] = perf_counter() - start
+
+        self.logger.info(f"Extracted {stats['pdfs']} PDFs ({stats['pages']} pages) in "
+                         f"{stats['seconds']:.1f}s, skipped {stats['skipped']}, "
+                         f"missing {stats['missing']}, failed {stats['failed']}")
+        return stats
+
+    @staticmethod
+    def _extract(job) -> Union[int, None]:
+        pdf_path, txt_path, text_cache = job
+        try:
+            return extract_to_sidecar(pdf_path, txt_path, text_cache)
+        except Exception as e:
+            # runs in a worker process, so log through that process's logger
+            logging.getLogger('litscan').warn(f'Failed to extract {pdf_path}: {e}')
+            return None
 
 if __name__ == '__main__':
-    import os
     import sys
     if len(sys.argv) < 2:
         raise RuntimeError('Usage: python PDFSummarizer.py <pdf_file> <*args:terms>')
@@ -0,0 +1,297 @@
+import asyncio
+import json
+import os
+from openai.types.chat import ChatCompletion
+from time import sleep
+from typing import Dict, List, Union
+
+BATCH_ENDPOINT = '/v1/chat/completions'
+FINISHED = ('completed', 'failed', 'expired', 'cancelled')
+
+class BatchScan:
+    """
+    Runs a relevance sweep through the OpenAI Batch API instead of
+    interactive completions: every (chunk, question) request is written to a
+    JSONL file, submitted as one batch, and once the batch finishes the
+    results are rebuilt into the same per-paper dicts `query_relevance`
+    returns. Suited to overnight sweeps where latency does not matter.
+
+    Requests already in the provider's `LLMCache` are not resubmitted, and
+    batch outputs are written back to it. For OpenAI-compatible servers that
+    do not implement /v1/batches (e.g. a local vLLM), pass `local=True` to
+    execute the batch file against chat.completions instead; the output file
+    has the same format, so collection is identical.
+
+    Batches ask plain text questions per (chunk, question), or per chunk in
+    multi_question mode. `relevance_mode='logprob'`, `cascade_model`, a
+    scanner's `retriever` and `early_exit` are not applied; `prepare` warns
+    when any of them is set, since the interactive path would score
+    differently.
+
+    Example usage:
+        batch = BatchScan(scanner, 'sweep.jsonl')
+        results = batch.run(pdf_filenames, questions, weights)
+
+        # or split across processes
+        batch_id = batch.submit(batch.prepare(pdf_filenames, questions))
+        ...
+        results = batch.collect(batch.wait(batch_id), questions, weights)
+    """
+    def __init__(self, scanner, batch_path: str, poll_interval: float=60.,
+                 local: bool=False):
+        self.scanner = scanner
+        self.batch_path = batch_path
+        self.manifest_path = batch_path + '.manifest.json'
+        self.output_path = batch_path.rsplit('.', 1)[0] + '.output.jsonl'
+        self.poll_interval = poll_interval
+        self.local = local
+        self.logger = scanner.logger
+
+    @property
+    def config(self):
+        return self.scanner.config
+
+    @property
+    def client(self):
+        return self.scanner.client_provider.client(self.config.openai_api_key,
+                                                   self.config.openai_base_url)
+
+    def run(self, pdf_filenames: List[str], questions: List[str],
+            weights: Union[List[float], None]=None) -> Dict[str, Dict]:
+        """Prepares, submits, waits for and collects a batch in one go."""
+        self.prepare(pdf_filenames, questions)
+        if self.local:
+            output = self.run_local()
+        else:
+            output = self.wait(self.submit())
+        return self.collect(output, questions, weights)
+
+    def unsupported_options(self) -> List[str]:
+        """Settings of the scanner that a batch scan cannot honour."""
+        options = []
+        if self.config.relevance_mode == 'logprob':
+            options.append("relevance_mode='logprob' (text answers are scored instead)")
+        if self.config.cascade_model:
+            options.append('cascade_model (every question goes to openai_model)')
+        if getattr(self.scanner, 'retriever', None) is not None:
+            options.append('retriever (whole chunks are asked instead of retrieved passages)')
+        if getattr(self.scanner, 'early_exit', None) is not None:
+            options.append('early_exit (every chunk is asked)')
+        return options
+
+    def prepare(self, pdf_filenames: List[str], questions: List[str]) -> str:
+        """
+        Extracts and chunks every PDF, then writes one batch request per
+        uncached (chunk, question) pair, or per chunk in multi_question mode.
+        The chunk layout is saved to a manifest next to the batch file.
+
+        Returns:
+            str: Path to the batch JSONL file
+        """
+        for option in self.unsupported_options():
+            self.logger.warn(f'batch scans ignore {option}; '
+                             f'scores may differ from scan_pdfs with the same settings')
+
+        multi = self.config.relevance_mode == 'multi_question'
+        cache = self.scanner.client_provider.cache
+        manifest = {'multi_question': multi, 'papers': {}, 'cached': {}}
+        n_requests = 0
+
+        with open(self.batch_path, 'w') as f:
+            for p, pdf_filename in enumerate(pdf_filenames):
+                chunks = self.scanner.get_pdf_chunks(pdf_filename)
+                if not chunks:
+                    continue
+
+                chunks = self.scanner.prefilter_chunks(chunks, questions)
+
+                manifest['papers'][pdf_filename] = len(chunks)
+                for i, chunk in enumerate(chunks):
+                    if multi:
+                        requests = {f'{p}-{i}-all': self.scanner._multi_relevance_messages(chunk, questions)}
+                    else:
+                        requests = {f'{p}-{i}-{j}': self.scanner._relevance_messages(chunk, question)
+                                    for j, question in enumerate(questions)}
+
+                    for custom_id, messages in requests.items():
+                        body = {'model': self.config.openai_model,
+                                'messages': messages,
+                                'temperature': 0.0}
+                        cached = cache.get(body) if cache is not None else None
+                        if cached is not None:
+                            manifest['cached'][custom_id] = cached.model_dump()
+                            continue
+
+                        f.write(json.dumps({'custom_id': custom_id,
+                                            'method': 'POST',
+                                            'url': BATCH_ENDPOINT,
+                                            'body': body}) + '\n')
+                        n_requests += 1
+
+        manifest['pdf_filenames'] = list(pdf_filenames)
+        with open(self.manifest_path, 'w') as f:
+            json.dump(manifest, f)
+
+        self.logger.info(f'wrote {n_requests} batch requests to {self.batch_path} '
+                         f'({len(manifest["cached"])} already cached)')
+        return self.batch_path
+
+    def submit(self, batch_path: Union[str, None]=None) -> Union[str, None]:
+        """Uploads the batch file and creates the batch. Returns the batch id."""
+        batch_path = batch_path or self.batch_path
+        if os.stat(batch_path).st_size == 0:
+            self.logger.info('every request is cached, nothing to submit')
+            return None
+
+        with open(batch_path, 'rb') as f:
+            batch_file = self.client.files.create(file=f, purpose='batch')
+
+        batch = self.client.batches.create(input_file_id=batch_file.id,
+                                           endpoint=BATCH_ENDPOINT,
+                                           completion_window='24h')
+        self.logger.info(f'submitted batch {batch.id} from {batch_path}')
+        return batch.id
+
+    def wait(self, batch_id: Union[str, None]) -> str:
+        """
+        Polls until the batch finishes and saves its output next to the
+        batch file.
+
+        Returns:
+            str: Path to the output JSONL file
+        """
+        output = ''
+        if batch_id is not None:
+            while True:
+                batch = self.client.batches.retrieve(batch_id)
+                self.logger.info(f'batch {batch_id} is {batch.status}')
+                if batch.status in FINISHED:
+                    break
+                sleep(self.poll_interval)
+
+            if batch.error_file_id:
+                self.logger.warn(f'batch {batch_id} reported errors in {batch.error_file_id}')
+            if batch.output_file_id:
+                output = self.client.files.content(batch.output_file_id).text
+            else:
+                self.logger.warn(f'batch {batch_id} finished as {batch.status} without output')
+
+        with open(self.output_path, 'w') as f:
+            f.write(output)
+        return self.output_path
+
+    def run_local(self) -> str:
+        """
+        Executes the batch file through chat.completions, for endpoints that
+        do not implement the Batch API, and writes output in the same format.
+
+        Returns:
+            str: Path to the output JSONL file
+        """
+        with open(self.batch_path) as f:
+            requests = [json.loads(line) for line in f if line.strip()]
+
+        async def execute(request):
+            try:
+                response = await self.scanner._acomplete(**request['body'])
+                return {'custom_id': request['custom_id'],
+                        'response': {'status_code': 200, 'body': response.model_dump()},
+                        'error': None}
+            except Exception as e:
+                return {'custom_id': request['custom_id'], 'response': None,
+                        'error': {'message': str(e)}}
+
+        async def execute_all():
+            return await asyncio.gather(*[execute(request) for request in requests])
+
+        with open(self.output_path, 'w') as f:
+            for line in self.scanner._run(execute_all()):
+                f.write(json.dumps(line) + '\n')
+
+        return self.output_path
+
+    def collect(self, output_path: str, questions: List[str],
+                weights: Union[List[float], None]=None) -> Dict[str, Dict]:
+        """
+        Rebuilds per-paper relevance results from a finished batch.
+
+        Returns:
+            dict: `query_relevance` result (or None) keyed by PDF filename
+        """
+        with open(self.manifest_path) as f:
+            manifest = json.load(f)
+
+        responses = {custom_id: ChatCompletion.model_validate(body)
+                     for custom_id, body in manifest['cached'].items()}
+        requests = {}
+        with open(self.batch_path) as f:
+            for line in f:
+                if line.strip():
+                    request = json.loads(line)
+                    requests[request['custom_id']] = request['body']
+
+        cache = self.scanner.client_provider.cache
+        with open(output_path) as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                result = json.loads(line)
+                response = result.get('response') or {}
+                if result.get('error') or response.get('status_code') != 200:
+                    self.logger.warn(f'batch request {result["custom_id"]} failed: '
+                                     f'{result.get("error")}')
+                    continue
+
+                completion = ChatCompletion.model_validate(response['body'])
+                responses[result['custom_id']] = completion
+                if cache is not None and result['custom_id'] in requests:
+                    cache.put(requests[result['custom_id']], completion)
+
+        async def finalize(p, pdf_filename, n_chunks):
+            chunks = None
+            chunk_answers = []
+            for i in range(n_chunks):
+                if manifest['multi_question']:
+                    answers = self.scanner._parse_verdicts(responses.get(f'{p}-{i}-all'),
+                                                           len(questions))
+                    if answers is None:
+                        self.logger.warn(f'Could not parse verdicts for {pdf_filename} chunk '
+                                         f'{i+1}, falling back to one call per question')
+                        if chunks is None:
+                            chunks = self.scanner.prefilter_chunks(
+                                await asyncio.to_thread(self.scanner.get_pdf_chunks, pdf_filename),
+                                questions)
+                        answers = await self.scanner._aask_chunk(i, chunks[i], questions,
+                                                                 multi_question=False)
+                else:
+                    answers = [self._answer(responses.get(f'{p}-{i}-{j}'))
+                               for j in range(len(questions))]
+                chunk_answers.append(answers)
+
+            if not chunk_answers:
+                return pdf_filename, {'score': 0.0, 'response': 'No response'}
+
+            if not any(answers and any(a is not None for a in answers)
+                       for answers in chunk_answers):
+                return pdf_filename, None
+
+            scores, relevant_answers = self.scanner._score_answers(chunk_answers, questions, weights)
+            return pdf_filename, await self.scanner._afinalize_relevance(scores, relevant_answers,
+                                                                         questions)
+
+        async def finalize_all():
+            return await asyncio.gather(*[
+                finalize(p, pdf_filename, manifest['papers'][pdf_filename])
+                for p, pdf_filename in enumerate(manifest['pdf_filenames'])
+                if pdf_filename in manifest['papers']
+            ])
+
+        results = {pdf_filename: None for pdf_filename in manifest['pdf_filenames']}
+        results.update(self.scanner._run(finalize_all()))
+        return results
+
+    @staticmethod
+    def _answer(response):
+        if response and response.choices:
+            return response.choices[0].message.content
+        return None
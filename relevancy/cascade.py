@@ -0,0 +1,70 @@
+from collections import Counter
+import threading
+from typing import Dict, List, Optional
+
+def escalation_reason(p_yes: List[Optional[float]], margin: float) -> Optional[str]:
+    """
+    Decides whether the small models' answers need the large model. Returns
+    'failed', 'disagreement' or 'margin', or None if they can be trusted.
+
+    Args:
+        p_yes (list): P(Yes) from each small model, None where a call failed
+        margin (float): Minimum |P(Yes) - P(No)| of the mean answer to accept it
+    """
+    if not p_yes or any(p is None for p in p_yes):
+        return 'failed'
+    if len({p >= .5 for p in p_yes}) > 1:
+        return 'disagreement'
+    mean = sum(p_yes) / len(p_yes)
+    if abs(2 * mean - 1) < margin:
+        return 'margin'
+    return None
+
+
+class CascadeStats:
+    """
+    Counts how often the small-to-large cascade escalates, and why, and how
+    often the large model agrees with the small one, both on escalated calls
+    and on a random sample of confident calls sent to it for auditing. Use
+    the audited agreement to judge whether `cascade_margin` can be lowered.
+    """
+    def __init__(self):
+        self.counts = Counter()
+        self._lock = threading.Lock()
+
+    def record(self, reason: Optional[str], audited: bool=False,
+               agreed: Optional[bool]=None) -> None:
+        with self._lock:
+            self.counts['calls'] += 1
+            if reason is not None:
+                self.counts['escalated'] += 1
+                self.counts[f'escalated_{reason}'] += 1
+                if agreed is not None:
+                    self.counts['escalated_compared'] += 1
+                    self.counts['escalated_agreed'] += agreed
+            elif audited and agreed is not None:
+                self.counts['audited'] += 1
+                self.counts['audited_agreed'] += agreed
+
+    @property
+    def escalation_rate(self) -> float:
+        return self.counts['escalated'] / self.counts['calls'] if self.counts['calls'] else 0.
+
+    def summary(self) -> Dict:
+        counts = dict(self.counts)
+        counts['escalation_rate'] = self.escalation_rate
+        if self.counts['escalated_compared']:
+            counts['escalated_agreement'] = (self.counts['escalated_agreed']
+                                             / self.counts['escalated_compared'])
+        if self.counts['audited']:
+            counts['audited_agreement'] = self.counts['audited_agreed'] / self.counts['audited']
+        return counts
+
+    def __repr__(self):
+        summary = self.summary()
+        text = (f'CascadeStats(calls={summary.get("calls", 0)}, '
+                f'escalated={summary.get("escalated", 0)} ({summary["escalation_rate"]:.0%})')
+        for key in ('escalated_agreement', 'audited_agreement'):
+            if key in summary:
+                text += f', {key}={summary[key]:.0%}'
+        return text + ')'
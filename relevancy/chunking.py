@@ -0,0 +1,154 @@
+"""
+Token-window chunking without decoding.
+
+Chunk boundaries are found by summing the UTF-8 byte lengths of the tokens
+and mapping those byte offsets back to character offsets, so each chunk is
+a slice of the original string rather than a `decode` of its token window.
+Tokenizers, and the per-token byte lengths of their vocabularies, are built
+once per process and shared by every caller.
+"""
+from functools import lru_cache
+import tiktoken
+from typing import Dict, Iterable, List, Sequence, Tuple
+
+DEFAULT_MODEL = 'gpt-4o'
+_CONTINUATION_BYTES = bytes(range(0x80, 0xc0))
+
+@lru_cache(maxsize=None)
+def get_tokenizer(model: str=DEFAULT_MODEL) -> tiktoken.Encoding:
+    """Returns the process-wide tokenizer for `model`."""
+    return tiktoken.encoding_for_model(model)
+
+@lru_cache(maxsize=None)
+def _token_byte_lengths(model: str) -> List[int]:
+    tokenizer = get_tokenizer(model)
+    lengths = [0] * tokenizer.n_vocab
+    for token in range(tokenizer.n_vocab):
+        try:
+            lengths[token] = len(tokenizer.decode_single_token_bytes(token))
+        except KeyError: # unused ids in the vocabulary
+            pass
+    return lengths
+
+def count_tokens(text: str, model: str=DEFAULT_MODEL) -> int:
+    return len(get_tokenizer(model).encode(text))
+
+def _char_offsets(text: str, tokens: Sequence[int], positions: Iterable[int],
+                  model: str=DEFAULT_MODEL) -> Dict[int, int]:
+    """
+    Maps token positions in `tokens`, the encoding of `text`, to character
+    offsets. A character split across two tokens belongs to the token with
+    its first byte.
+    """
+    lengths = _token_byte_lengths(model)
+    encoded = None if text.isascii() else text.encode('utf8')
+
+    # only the requested positions need offsets, so sum token byte lengths between them
+    offsets, byte_offset, char_offset, previous = {0: 0}, 0, 0, 0
+    for position in sorted(set(positions)):
+        n_bytes = sum(map(lengths.__getitem__, tokens[previous:position]))
+        if encoded is None:
+            char_offset += n_bytes
+        else: # count the characters that start within these bytes
+            segment = encoded[byte_offset:byte_offset + n_bytes]
+            char_offset += len(segment.translate(None, _CONTINUATION_BYTES))
+        byte_offset += n_bytes
+        offsets[position], previous = char_offset, position
+    return offsets
+
+def window_offsets(text: str, tokens: Sequence[int], chunk_size: int, overlap: int,
+                   model: str=DEFAULT_MODEL) -> List[Tuple[int, int]]:
+    """
+    Returns the (start, end) character offsets of overlapping windows of
+    `chunk_size` tokens, each starting `chunk_size - overlap` tokens after
+    the previous one. A character split across two tokens at a window
+    boundary belongs to the window that ends with its first byte.
+    """
+    if overlap >= chunk_size:
+        raise ValueError('overlap must be smaller than chunk_size')
+
+    windows = [(start, min(start + chunk_size, len(tokens)))
+               for start in range(0, len(tokens), chunk_size - overlap)]
+    offsets = _char_offsets(text, tokens, [offset for window in windows for offset in window], model)
+    return [(offsets[start], offsets[end]) for start, end in windows]
+
+def chunk_text(text: str, chunk_size: int=2048*32, overlap: int=2048*16,
+               model: str=DEFAULT_MODEL) -> List[str]:
+    """Split text into overlapping chunks based on token count."""
+    tokens = get_tokenizer(model).encode(text)
+    return [text[start:end] for start, end in window_offsets(text, tokens, chunk_size, overlap, model)]
+
+def chunk_texts(texts: List[str], chunk_size: int=2048*32, overlap: int=2048*16,
+                model: str=DEFAULT_MODEL, num_threads: int=8) -> List[List[str]]:
+    """
+    Chunks many texts at once, tokenizing them in parallel with
+    `encode_batch` (tiktoken releases the GIL while encoding).
+    """
+    batches = get_tokenizer(model).encode_batch(texts, num_threads=num_threads)
+    return [[text[start:end] for start, end in window_offsets(text, tokens, chunk_size, overlap, model)]
+            for text, tokens in zip(texts, batches)]
+
+
+class IncrementalChunker:
+    """
+    Builds the same overlapping token windows as `chunk_text` from text that
+    arrives piece by piece, such as the pages of a PDF as they are parsed.
+    Each piece is tokenized on its own and a chunk is returned as soon as
+    its window fills, so only about one window of text is held at a time.
+
+    Example usage:
+        chunker = IncrementalChunker(chunk_size=2048, overlap=256)
+        for page in pages:
+            for chunk in chunker.add(page):
+                ...
+        for chunk in chunker.finish():
+            ...
+    """
+    def __init__(self, chunk_size: int=2048*32, overlap: int=2048*16,
+                 model: str=DEFAULT_MODEL):
+        if overlap >= chunk_size:
+            raise ValueError('overlap must be smaller than chunk_size')
+        self.chunk_size = chunk_size
+        self.step = chunk_size - overlap
+        self.model = model
+        self._pieces = [] # (text, tokens) not yet fully behind the next window
+        self._start = 0 # token offset of the next window into self._pieces
+        self._size = 0 # tokens in self._pieces
+
+    def add(self, text: str) -> List[str]:
+        """Adds the next piece of text and returns the chunks it completes."""
+        tokens = get_tokenizer(self.model).encode(text)
+        if tokens:
+            self._pieces.append((text, tokens))
+            self._size += len(tokens)
+
+        chunks = []
+        while self._size - self._start >= self.chunk_size:
+            chunks.append(self._window(self._start + self.chunk_size))
+        return chunks
+
+    def finish(self) -> List[str]:
+        """Returns the remaining chunks once all text has been added."""
+        chunks = []
+        while self._start < self._size:
+            chunks.append(self._window(min(self._start + self.chunk_size, self._size)))
+        self._pieces, self._start, self._size = [], 0, 0
+        return chunks
+
+    def _window(self, end: int) -> str:
+        """Slices the window [self._start, end) out of the pieces, then advances."""
+        parts, offset = [], 0
+        for text, tokens in self._pieces:
+            lo, hi = max(self._start - offset, 0), min(end - offset, len(tokens))
+            if lo < hi:
+                offsets = _char_offsets(text, tokens, (lo, hi), self.model)
+                parts.append(text[offsets[lo]:offsets[hi]])
+            offset += len(tokens)
+
+        # drop pieces that lie wholly before the next window
+        self._start += self.step
+        while self._pieces and len(self._pieces[0][1]) <= self._start:
+            n_tokens = len(self._pieces.pop(0)[1])
+            self._start -= n_tokens
+            self._size -= n_tokens
+        return ''.join(parts)
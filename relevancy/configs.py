@@ -1,6 +1,6 @@
 from dataclasses import dataclass
 import os
-from typing import Union
+from typing import List, Union
 
 @dataclass
 class LLMConfig:
@@ -18,6 +18,25 @@ class LitScanConfig:
     openai_api_key: str="EMPTY"
     openai_base_url: str="http://lambda13.cels.anl.gov:9999/v1"
     openai_model: str="llama31-405b-fp8"
+    openai_base_urls: Union[List[str], None]=None # replicas to balance across, overrides openai_base_url
+    openai_base_url_weights: Union[List[float], None]=None
+    max_concurrency: int=16
+    max_concurrent_papers: int=8
+    relevance_mode: str="per_question" # or "multi_question", "logprob"
+    synthesis_max_tokens: int=8192 # larger answer sets are synthesized hierarchically
+    triage_model: Union[str, None]=None # cheap model for abstract triage, defaults to openai_model
+    triage_batch_size: int=20 # abstracts per triage call
+    triage_bm25_top_k: Union[int, None]=None # abstracts kept by bm25 triage, all that match if None
+    triage_bm25_threshold: float=0. # bm25 triage drops abstracts scoring at or below this
+    packing_max_tokens: int=12000 # budget of documents per packed screening call
+    cascade_model: Union[str, List[str], None]=None # small model(s) asked before openai_model
+    cascade_margin: float=.6 # escalate when |P(Yes) - P(No)| of the small model is below this
+    cascade_audit_rate: float=.05 # share of confident small-model answers checked by openai_model
+    stream_pages: bool=False # score chunks while later pages of a PDF are still being parsed
+    triage_pages: Union[int, None]=None # score only the first pages of each PDF...
+    triage_tokens: Union[int, None]=None # ...or its first tokens, reading the rest only if borderline
+    triage_borderline: float=.2 # logprob mode: read the whole PDF when an answer was at least this likely Yes
+    archive_pdfs: bool=False # scan_pmcids saves every downloaded PDF, not only relevant ones
 
 @dataclass
 class PPIScanConfig:
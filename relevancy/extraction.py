@@ -0,0 +1,137 @@
+from chunking import get_tokenizer, window_offsets
+import hashlib
+import json
+import logging
+import os
+import pymupdf
+from typing import Iterator, List, Union
+
+# bump when the extracted text changes so cached text is re-extracted
+EXTRACTOR_VERSION = f'pymupdf-{pymupdf.VersionBind}-1'
+
+class TextCache:
+    """
+    Persistent cache of extracted PDF text, one JSON file of page texts per
+    PDF in `directory`, keyed on the SHA-256 of the PDF's bytes and the
+    extractor version. Renamed or re-downloaded copies of a paper hit the
+    same entry, while a new pymupdf release or extraction change misses.
+    Entries are written to a temporary file and renamed into place, so
+    several processes can share one directory.
+
+    Example usage:
+        cache = TextCache('text_cache')
+        scanner = PMCScanner(logger, cfg, text_cache=cache)
+    """
+    def __init__(self, directory: str='text_cache', version: str=EXTRACTOR_VERSION,
+                 logger: Union[logging.Logger, None]=None):
+        self.directory = directory
+        self.version = version
+        self.logger = logger if logger is not None else logging.getLogger('litscan')
+        self.hits = 0
+        self.misses = 0
+
+        os.makedirs(directory, exist_ok=True)
+
+    @staticmethod
+    def digest(pdf: Union[str, bytes]) -> str:
+        """SHA-256 of a PDF's bytes, given a path or the bytes themselves."""
+        if isinstance(pdf, bytes):
+            return hashlib.sha256(pdf).hexdigest()
+
+        sha = hashlib.sha256()
+        with open(pdf, 'rb') as f:
+            for block in iter(lambda: f.read(1 << 20), b''):
+                sha.update(block)
+        return sha.hexdigest()
+
+    def path(self, digest: str) -> str:
+        key = hashlib.sha256(f'{digest}:{self.version}'.encode('utf8')).hexdigest()
+        return os.path.join(self.directory, key[:2], f'{key}.json')
+
+    def get(self, digest: str) -> Union[List[str], None]:
+        try:
+            with open(self.path(digest), encoding='utf8') as f:
+                pages = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        self.logger.info(f'text cache hit {digest[:12]} ({self.hits} hits, {self.misses} misses)')
+        return pages
+
+    def put(self, digest: str, pages: List[str]) -> None:
+        path = self.path(digest)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f'{path}.{os.getpid()}.tmp'
+        try:
+            with open(tmp_path, 'w', encoding='utf8') as f:
+                json.dump(pages, f, ensure_ascii=False)
+            os.replace(tmp_path, path)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+    def __repr__(self):
+        return f'TextCache({self.directory!r}, hits={self.hits}, misses={self.misses})'
+
+
+def iter_pages(pdf: Union[str, bytes], cache: Union[TextCache, None]=None,
+               max_pages: Union[int, None]=None) -> Iterator[str]:
+    """
+    Yields the text of each page of a PDF, given as a path or as bytes
+    already in memory, as it is parsed, or from `cache` if the same PDF was
+    extracted before. Without a cache, no more than one page of text is held
+    at a time. With `max_pages`, only the first pages are parsed (and nothing
+    is cached).
+    """
+    if cache is not None:
+        digest = cache.digest(pdf)
+        pages = cache.get(digest)
+        if pages is not None:
+            yield from pages[:max_pages]
+            return
+
+    pages = []
+    with _open(pdf) as doc:
+        for i, page in enumerate(doc):
+            if max_pages is not None and i >= max_pages:
+                return
+            text = page.get_text()
+            if cache is not None:
+                pages.append(text)
+            yield text
+
+    if cache is not None:
+        cache.put(digest, pages)
+
+def page_count(pdf: Union[str, bytes]) -> int:
+    """Number of pages of a PDF, read from its page tree without parsing any page."""
+    with _open(pdf) as doc:
+        return doc.page_count
+
+def _open(pdf: Union[str, bytes]) -> pymupdf.Document:
+    return pymupdf.open(stream=pdf, filetype='pdf') if isinstance(pdf, bytes) else pymupdf.open(pdf)
+
+def extract_pages(pdf: Union[str, bytes], cache: Union[TextCache, None]=None,
+                  max_pages: Union[int, None]=None,
+                  max_tokens: Union[int, None]=None) -> List[str]:
+    """
+    Extracts the text of each page of a PDF, reading it from `cache` if the
+    same PDF was extracted before and storing it there otherwise. Extraction
+    stops after `max_pages` pages or once `max_tokens` tokens are collected,
+    the last page being cut at the token budget.
+    """
+    if max_tokens is None:
+        return list(iter_pages(pdf, cache, max_pages))
+
+    pages, budget = [], max_tokens
+    for text in iter_pages(pdf, cache, max_pages):
+        tokens = get_tokenizer().encode(text)
+        if len(tokens) >= budget:
+            (start, end), *_ = window_offsets(text, tokens, budget, 0)
+            pages.append(text[start:end])
+            break
+        pages.append(text)
+        budget -= len(tokens)
+    return pages
@@ -1,20 +1,56 @@
+import asyncio
+from batch_scan import BatchScan
+from cascade import CascadeStats, escalation_reason
+from chunking import IncrementalChunker, chunk_text, count_tokens
+from collections import Counter
 from configs import LLMConfig, LitScanConfig
+from extraction import TextCache, extract_pages, iter_pages, page_count
 import json
-from openai import OpenAI
+import math
+from llm_client import ClientProvider, default_provider
+from metrics import current_tags, tag
+from packing import DocumentPacker
+from prefilter import BM25Prefilter
+from prompts import (MULTI_QUESTION_RELEVANCE, PACKED_RELEVANCE, RELEVANCE_CONTENT, 
+                     RELEVANCE_QUESTION, RELEVANCE_SYSTEM, TRIAGE_PROMPT)
+from resilience import RETRYABLE_STATUS, parse_retry_after
+from sections import SectionChunker
+from synthesis import HierarchicalSynthesizer
 import os
-import pymupdf
+import random
 import requests
 import subprocess
 import sys
-import tiktoken
-from time import sleep
-from typing import Dict, List, Union
+import threading
+from time import monotonic, sleep
+from typing import Dict, List, Optional, Union
 from xml.etree import ElementTree as ET
 
 # Add the directory containing the current script to Python path
 # Or to get the parent directory (if modules are one level up)
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
+RELEVANCE_VERDICTS_SCHEMA = {
+    'type': 'array',
+    'items': {
+        'type': 'object',
+        'properties': {
+            'question_index': {'type': 'integer'},
+            'relevant': {'type': 'boolean'},
+            'explanation': {'type': 'string'},
+        },
+        'required': ['question_index', 'relevant', 'explanation'],
+    },
+}
+
+_JSON_TYPES = {'integer': int, 'boolean': bool, 'string': str}
+
+# metric tag for calls that ask every question at once
+MULTI_QUESTION_TAG = '<all questions>'
+
+EUTILS_URL = 'https://eutils.ncbi.nlm.nih.gov/entrez/eutils/'
+IDCONV_URL = 'https://www.ncbi.nlm.nih.gov/pmc/utils/idconv/v1.0/'
+
 class Logger:
     def __init__(self, config=LLMConfig):
         import logging
@@ -32,16 +68,59 @@ class LitScanner:
     """
     Base literature scanner. Capable of working with local PDF files only. See 
     child classes for scraping PMC/STRING-DB papers.
+
+    Setting `early_exit` stops asking relevance questions once a paper's
+    verdict is decided (the summed chunk score already exceeds
+    `relevancy_cutoff`, and scores only grow). With 'stop' the remaining
+    chunks are skipped entirely; with 'collect' later chunks are still asked
+    the questions that have no relevant answer yet, so synthesis can cover
+    every question. Chunks are then scored one after another instead of
+    concurrently, and results gain an 'llm_calls_skipped' count.
+
+    A `prefilter` (see `prefilter.BM25Prefilter`) drops chunks that share
+    little vocabulary with the questions before they are sent to the LLM;
+    the tokens it saves are tallied in `prefilter_stats`.
+
+    With a `retriever` (see `retrieval.EmbeddingRetriever`) papers are split
+    into small embedded passages instead of chunks, and each question is
+    asked once against only its top-k passages.
+
+    A `chunker` (see `sections.SectionChunker`) replaces fixed token windows
+    with chunks cut on section boundaries, leaving out references, running
+    headers and other boilerplate; each paper's token reduction is kept in
+    `section_report`.
+
+    With a `text_cache` (see `extraction.TextCache`) the text of a PDF is
+    extracted once and reused by later scans, even under another filename.
     """
     def __init__(self, logger=Logger, pdfs=None, outdir='.', 
                  chunk_size=2048*8, chunk_overlap=2048*4, 
-                 relevancy_cutoff: float=.1):
+                 relevancy_cutoff: float=.1,
+                 client_provider: Union[ClientProvider, None]=None,
+                 early_exit: Union[str, None]=None,
+                 prefilter: Union[BM25Prefilter, None]=None,
+                 retriever=None,
+                 chunker: Union[SectionChunker, None]=None,
+                 text_cache: Union[TextCache, None]=None):
         self.logger = logger.log
         self.pdfs = pdfs
         self.outdir = outdir
         self.size = chunk_size
         self.overlap = chunk_overlap
         self.relevancy_cutoff = relevancy_cutoff
+        self.early_exit = early_exit # None, 'stop' or 'collect'
+        self.prefilter = prefilter
+        self.prefilter_stats = Counter()
+        self.cascade_stats = CascadeStats()
+        self.retriever = retriever
+        self.chunker = chunker
+        self.section_report = {}
+        self.text_cache = text_cache
+        self.config = LitScanConfig()
+        self.client_provider = client_provider if client_provider is not None else default_provider()
+        self._aio = None
+        self._download_lock = threading.Lock()
+        self._last_download = 0.
 
     def get_pdf(self, pmcid):
         """
@@ -106,7 +185,297 @@ class LitScanner:
             self.logger.info(" ".join(wget_command), "failed")
             self.logger.warn(f"Failed to download {pmcid} PDF. Error: {e}")
     
-    def is_pdf_relevant(self, pdf_filename, questions, weights):
+    def fetch_pdf(self, pmcid):
+        """
+        Downloads a PDF article from PubMed Central into memory, or reads it
+        from `outdir` if it was saved there before. Downloads are spaced at
+        least a second apart across threads, per NCBI usage guidelines.
+        Throttled (429) and transient server errors are retried, waiting as
+        long as `Retry-After` asks, or with jittered exponential backoff;
+        the wait holds back every download, not just this one.
+
+        Args:
+            pmcid (str): The PubMed Central ID of the article to download
+
+        Returns:
+            bytes: The PDF, or None if the download failed or was not a PDF
+        """
+        pdf = os.path.join(self.outdir, f'{pmcid}.pdf')
+        if os.path.exists(pdf) and os.path.getsize(pdf) > 0:
+            with open(pdf, 'rb') as f:
+                return f.read()
+
+        pdf_url = f'http://www.ncbi.nlm.nih.gov/pmc/articles/{pmcid}/pdf/'
+        headers = {'User-Agent': 'Mozilla/5.0 (Windows NT 5.2; rv:2.0.1) Gecko/20100101 Firefox/4.0.1'}
+        for attempt in range(3):
+            with self._download_lock:
+                wait = self._last_download + 1 - monotonic()
+                if wait > 0:
+                    sleep(wait)
+                self._last_download = monotonic()
+
+            try:
+                response = requests.get(pdf_url, headers=headers, timeout=60)
+            except requests.RequestException as e:
+                self.logger.warn(f"Failed to download {pmcid} PDF. Error: {e}")
+                continue
+
+            if response.ok and response.content.startswith(b'%PDF'):
+                self.logger.info(f"{pmcid}.pdf downloaded into memory")
+                return response.content
+            status = response.status_code
+            if not (status == 429 or status >= 500 or status in RETRYABLE_STATUS):
+                reason = 'not a PDF' if response.ok else f'status {status}'
+                self.logger.warn(f"Failed to download {pmcid} PDF: {reason}")
+                return None
+
+            delay = parse_retry_after(response.headers)
+            if delay is None:
+                delay = random.uniform(0, 2 ** (attempt + 1))
+            self.logger.info(f"Download of {pmcid} got status {status}, retrying in {delay:.1f}s")
+            with self._download_lock:
+                self._last_download = max(self._last_download, monotonic() + delay - 1)
+
+        self.logger.warn(f"Failed to download {pmcid} PDF")
+        return None
+
+    def save_pdf(self, pmcid, data):
+        """
+        Writes a PDF held in memory to `outdir/{pmcid}.pdf`, through a
+        temporary file so readers never see a partial PDF.
+        """
+        pdf = os.path.join(self.outdir, f'{pmcid}.pdf')
+        if os.path.exists(pdf):
+            return
+
+        tmp = f'{pdf}.{os.getpid()}.tmp'
+        with open(tmp, 'wb') as f:
+            f.write(data)
+        os.replace(tmp, pdf)
+
+    def is_pdf_relevant(self, pdf_filename, questions, weights, max_pages=None, max_tokens=None,
+                        data=None):
+        """
+        Scores a PDF in `outdir` against the questions.
+
+        With `max_pages` or `max_tokens` (defaulting to `config.triage_pages`
+        and `config.triage_tokens`) only the first pages are extracted and
+        scored. The whole PDF is read only if that result is borderline: not
+        relevant, but with some answer at least `config.triage_borderline`
+        likely to be Yes, or with failed calls.
+
+        If `data` holds the PDF's bytes, it is read from memory and
+        `pdf_filename` only names it.
+        """
+        return self._run(self.ais_pdf_relevant(pdf_filename, questions, weights,
+                                               max_pages=max_pages, max_tokens=max_tokens,
+                                               data=data))
+
+    async def ais_pdf_relevant(self, pdf_filename, questions, weights, max_pages=None, max_tokens=None,
+                               data=None):
+        """
+        Async counterpart of `is_pdf_relevant`. PDF parsing runs on a worker
+        thread so that other papers can keep scoring in the meantime. With
+        `config.stream_pages`, chunks are scored as soon as their pages are
+        parsed (unless a chunker, prefilter or early exit needs them all).
+        """
+        max_pages = max_pages if max_pages is not None else self.config.triage_pages
+        max_tokens = max_tokens if max_tokens is not None else self.config.triage_tokens
+        with tag(paper=pdf_filename):
+            if max_pages is not None or max_tokens is not None:
+                decided, results = await self._atriage_pdf(pdf_filename, questions, weights,
+                                                           max_pages, max_tokens, data=data)
+                if decided:
+                    return results
+
+            if (self.config.stream_pages and self.retriever is None and self.chunker is None
+                    and self.prefilter is None and self.early_exit is None):
+                return await self.aquery_relevance_stream(self.astream_pdf_chunks(pdf_filename, data),
+                                                          questions, weights)
+
+            if self.retriever is not None:
+                content = await asyncio.to_thread(self.get_pdf_text, pdf_filename, data)
+                if not content:
+                    return None
+
+                return await self.aquery_relevance_retrieval(content, questions, weights)
+
+            chunks = await asyncio.to_thread(self.get_pdf_chunks, pdf_filename, data)
+            if not chunks:
+                return None
+
+            return await self.aquery_relevance(chunks, questions, weights)
+
+    async def _atriage_pdf(self, pdf_filename, questions, weights, max_pages, max_tokens, data=None):
+        """
+        Scores only the first `max_pages` pages or `max_tokens` tokens of a
+        PDF. If they were not found relevant, the rest of the paper is still
+        read when the triage is borderline: a call failed, a question was
+        answered Yes on too few chunks to clear the cutoff, or, in logprob
+        mode, an answer had P(Yes) of at least `config.triage_borderline`.
+
+        Returns:
+            bool: Whether the first pages settle the paper's relevance
+            dict: The relevance result if they do
+        """
+        pages = await asyncio.to_thread(self.get_pdf_pages, pdf_filename, max_pages, max_tokens, data)
+        if not pages: # missing, or no text on the first pages
+            return False, None
+
+        n_tokens = sum(map(count_tokens, pages))
+        chunks = self._chunk_text(''.join(pages), chunk_size=self.size, overlap_tokens=self.overlap)
+        self.logger.info(f'triage of {pdf_filename} on {len(pages)} pages ({n_tokens} tokens)')
+
+        chunk_answers = await asyncio.gather(
+            *[self._aask_chunk(i, chunk, questions) for i, chunk in enumerate(chunks)]
+        )
+        scores, relevant_answers = self._score_answers(chunk_answers, questions, weights)
+        if self._is_relevant(scores, relevant_answers):
+            return True, await self._aconclude_relevance(chunks, chunk_answers, questions, weights)
+
+        flat = [answer for answers in chunk_answers for answer in answers or []]
+        failed = None in chunk_answers or None in flat
+        said_yes = any(answer is not None for answers in relevant_answers for answer in answers)
+        p_yes = max((answer for answer in flat if isinstance(answer, float)), default=0.)
+        reason = ('failed calls' if failed else 'a Yes below the cutoff' if said_yes
+                  else f'P(Yes) up to {p_yes:.2f}' if p_yes >= self.config.triage_borderline
+                  else None)
+        if reason is not None and not await asyncio.to_thread(
+                self._triage_complete, pdf_filename, data, pages, n_tokens, max_tokens):
+            self.logger.info(f'triage of {pdf_filename} is borderline ({reason}), '
+                             f'extracting the whole PDF')
+            self.client_provider.metrics.count('triage_full_extractions')
+            return False, None
+
+        return True, await self._aconclude_relevance(chunks, chunk_answers, questions, weights)
+
+    def _triage_complete(self, pdf_filename, data, pages, n_tokens, max_tokens):
+        """Whether the triage pages are the whole document."""
+        if max_tokens is not None and n_tokens >= max_tokens:
+            return False
+        try:
+            return len(pages) >= page_count(self._pdf_source(pdf_filename, data))
+        except Exception as e:
+            self.logger.warn(f'Error counting pages of {pdf_filename}: {e}')
+            return False
+
+    def get_pdf_chunks(self, pdf_filename, data=None):
+        """
+        Extracts the text of a PDF in `outdir` and splits it into chunks,
+        by section if a `chunker` is set.
+
+        Returns:
+            list: Text chunks, or None if the PDF is missing or has no text
+        """
+        if self.chunker is not None:
+            return self.get_pdf_section_chunks(pdf_filename, data)
+
+        content = self.get_pdf_text(pdf_filename, data)
+        if not content:
+            return None
+        
+        # Split content into chunks
+        self.logger.info(f'splitting content into chunks')
+        return self._chunk_text(content, chunk_size=self.size, overlap_tokens=self.overlap)
+
+    def get_pdf_section_chunks(self, pdf_filename, data=None):
+        """
+        Splits a PDF in `outdir` into chunks of the sections selected by
+        `self.chunker` and records its token reduction in `section_report`.
+        """
+        pages = self.get_pdf_pages(pdf_filename, data=data)
+        if not pages:
+            return None
+
+        chunks, report = self.chunker.chunk(pages, chunk_size=self.size, overlap=self.overlap)
+        self.section_report[pdf_filename] = report
+        reduction = 1 - report['tokens_kept'] / report['tokens'] if report['tokens'] else 0.
+        self.logger.info(f'sections kept {report["tokens_kept"]}/{report["tokens"]} tokens '
+                         f'({reduction:.0%} reduction) of {pdf_filename}, dropped '
+                         f'{", ".join(report["dropped"]) or "nothing"}')
+        self.client_provider.metrics.count('section_tokens_dropped',
+                                           report['tokens'] - report['tokens_kept'])
+        return chunks or None
+
+    def get_pdf_text(self, pdf_filename, data=None):
+        """
+        Extracts the text of a PDF in `outdir`. Empty files are removed.
+
+        Returns:
+            str: Text content, or None if the PDF is missing or has no text
+        """
+        pages = self.get_pdf_pages(pdf_filename, data=data)
+        return ''.join(pages) if pages else None
+
+    def get_pdf_pages(self, pdf_filename, max_pages=None, max_tokens=None, data=None):
+        """
+        Extracts the text of each page of a PDF in `outdir`, or of the first
+        pages within `max_pages`/`max_tokens`. Empty files are removed.
+
+        Returns:
+            list: Text of each page, or None if the PDF is missing or has no text
+        """
+        pdf = self._pdf_source(pdf_filename, data)
+        if pdf is None:
+            return None
+
+        # Extract text from PDF
+        self.logger.info(f'extracting text from {pdf_filename if data is not None else pdf}')
+        return self.extract_pdf_pages(pdf, max_pages=max_pages, max_tokens=max_tokens)
+
+    def iter_pdf_chunks(self, pdf_filename, data=None):
+        """
+        Yields the chunks of a PDF in `outdir` as soon as its pages fill
+        them, parsing and tokenizing one page at a time. Extraction errors
+        are raised, since the chunks already yielded cover only part of the
+        paper.
+        """
+        pdf = self._pdf_source(pdf_filename, data)
+        if pdf is None:
+            return
+
+        self.logger.info(f'streaming chunks from {pdf_filename if data is not None else pdf}')
+        chunker = IncrementalChunker(chunk_size=self.size, overlap=self.overlap)
+        try:
+            for page in iter_pages(pdf, self.text_cache):
+                yield from chunker.add(page)
+        except Exception as e:
+            self.logger.warn(f"Error extracting text from {pdf_filename}: {e}")
+            raise
+        yield from chunker.finish()
+
+    async def astream_pdf_chunks(self, pdf_filename, data=None):
+        """
+        Async counterpart of `iter_pdf_chunks`. The PDF is parsed on a worker
+        thread and each chunk is yielded as soon as it is complete.
+        """
+        loop = asyncio.get_running_loop()
+        queue = asyncio.Queue()
+        done = object()
+
+        def produce():
+            try:
+                for chunk in self.iter_pdf_chunks(pdf_filename, data):
+                    loop.call_soon_threadsafe(queue.put_nowait, chunk)
+            finally:
+                loop.call_soon_threadsafe(queue.put_nowait, done)
+
+        producer = asyncio.ensure_future(asyncio.to_thread(produce))
+        while True:
+            chunk = await queue.get()
+            if chunk is done:
+                break
+            yield chunk
+        await producer
+
+    def _pdf_source(self, pdf_filename, data=None):
+        """
+        The PDF's bytes if given, else its path in `outdir`, or None if it is
+        missing or empty (empty files are removed).
+        """
+        if data is not None:
+            return data or None
+
         pdf = os.path.join(self.outdir, pdf_filename)
         try:
             if os.stat(pdf).st_size == 0:
@@ -115,112 +484,485 @@ class LitScanner:
         except FileNotFoundError:
             self.logger.info(f"The file {pdf} does not exist")
             return None
+        return pdf
 
-        # Extract text from PDF
-        self.logger.info(f'extracting text from {pdf}')
-        content = self.extract_pdf_text(pdf)
-        if not content:
-            return None
-        
-        # Split content into chunks
-        self.logger.info(f'splitting content into chunks')
-        chunks = self._chunk_text(content, chunk_size=self.size, overlap_tokens=self.overlap)
-        
-        return self.query_relevance(chunks, questions, weights)
+    def scan_pdfs(self, pdf_filenames: List[str], questions: List[str], 
+                  weights: Union[List[float], None]=None) -> List[Dict]:
+        """
+        Scores many local PDFs concurrently. Up to `config.max_concurrent_papers`
+        papers are in flight at once and at most `config.max_concurrency` LLM
+        requests are outstanding across all of them.
+
+        Args:
+            pdf_filenames (list): PDF filenames relative to `outdir`
+            questions (list): Questions to score each paper against
+            weights (list, optional): Per-question weights
+
+        Returns:
+            list: One `is_pdf_relevant` result per filename, in input order
+        """
+        return self._run(self.ascan_pdfs(pdf_filenames, questions, weights))
+
+    async def ascan_pdfs(self, pdf_filenames, questions, weights=None):
+        """Async counterpart of `scan_pdfs`."""
+        papers = asyncio.Semaphore(self.config.max_concurrent_papers)
+
+        async def scan(pdf_filename):
+            async with papers:
+                try:
+                    return await self.ais_pdf_relevant(pdf_filename, questions, weights)
+                except Exception as e:
+                    self.logger.warn(f"Error scanning {pdf_filename}: {e}")
+                    self.client_provider.metrics.count('dropped_papers')
+                    return None
+
+        return await asyncio.gather(*[scan(pdf) for pdf in pdf_filenames])
+
+    def scan_pmcids(self, pmcids: List[str], questions: List[str],
+                    weights: Union[List[float], None]=None,
+                    archive: Union[bool, None]=None) -> Dict[str, Dict]:
+        """
+        Downloads, extracts and scores PMC papers entirely in memory, like
+        `get_pdf` followed by `scan_pdfs` but without the round trip through
+        `outdir`. A PDF is written to `outdir` only if the paper is relevant
+        or `archive` (default `config.archive_pdfs`) is set; PDFs already in
+        `outdir` are read from there.
+
+        Returns:
+            dict: `is_pdf_relevant` result keyed by PMCID, None for papers that
+                  could not be downloaded or scored
+        """
+        return self._run(self.ascan_pmcids(pmcids, questions, weights, archive))
+
+    async def ascan_pmcids(self, pmcids, questions, weights=None, archive=None):
+        """Async counterpart of `scan_pmcids`."""
+        archive = archive if archive is not None else self.config.archive_pdfs
+        papers = asyncio.Semaphore(self.config.max_concurrent_papers)
+
+        async def scan(pmcid):
+            async with papers:
+                data = await asyncio.to_thread(self.fetch_pdf, pmcid)
+                if data is None:
+                    self.client_provider.metrics.count('dropped_papers')
+                    return None
+
+                try:
+                    result = await self.ais_pdf_relevant(f'{pmcid}.pdf', questions, weights, data=data)
+                except Exception as e:
+                    self.logger.warn(f"Error scanning {pmcid}: {e}")
+                    self.client_provider.metrics.count('dropped_papers')
+                    result = None
+
+                relevant = result is not None and result['response'] != 'No response'
+                if relevant or archive:
+                    await asyncio.to_thread(self.save_pdf, pmcid, data)
+                return result
+
+        results = await asyncio.gather(*[scan(pmcid) for pmcid in pmcids])
+        return dict(zip(pmcids, results))
+
+    def scan_pdfs_batch(self, pdf_filenames: List[str], questions: List[str], 
+                        weights: Union[List[float], None]=None, 
+                        batch_path: str='relevance_batch.jsonl',
+                        poll_interval: float=60., local: bool=False) -> Dict[str, Dict]:
+        """
+        Scores many local PDFs through the Batch API rather than interactive
+        completions, which is cheaper for large sweeps that can wait. See
+        `batch_scan.BatchScan` for running the stages separately.
+
+        Questions are asked as plain text prompts, per question or in
+        multi_question mode. `relevance_mode='logprob'`, `cascade_model`,
+        `retriever` and `early_exit` are ignored with a warning, so scores
+        can differ from `scan_pdfs` with the same settings.
+
+        Returns:
+            dict: `is_pdf_relevant` result keyed by PDF filename
+        """
+        batch = BatchScan(self, batch_path, poll_interval=poll_interval, local=local)
+        return batch.run(pdf_filenames, questions, weights)
 
     def query_relevance(self, chunks, questions, weights=None) -> Dict:
         """
         Queries whether or not any of the chunks of text have relevance to
         our supplied question(s). Scores based on user-supplied weights or
-        uniform weights if not provided. In multi-question prompts, leverages
-        prompt caching for a 50% discount on GPT-4o for each additional
-        question.
-        """
-        # Process each chunk
-        total_chunks = len(chunks)
-        chunk_responses = [[] for _ in range(total_chunks)]
-        relevant_answers = [[None for c in range(total_chunks)] for _ in range(len(questions))]
-        scores = [0 for _ in range(total_chunks)]
-        print('\n'.join(questions))
-        for i, chunk in enumerate(chunks):
-            try:
-                responses = self.ask_llm_about_relevance(chunk, questions)
-
-                for j, response in enumerate(responses):
-                    if response and response.choices:
-                        answer = response.choices[0].message.content
-                        print(answer) # only prints if we have an answer
-                        is_chunk_relevant = answer.lower().startswith('yes')
-                        
-                        if is_chunk_relevant:
-                            if weights is None:
-                                scores[i] += 1 / len(questions)
-                            else:
-                                scores[i] += weights[j] / sum(weights)
-                            
-                            try:
-                                relevant_answers[i][j] = [answer]
-                            except IndexError: # if only 1 chunk total
-                                relevant_answers[j] = [answer]
-
-                        chunk_responses[i].append(response)
+        uniform weights if not provided. The chunk is placed ahead of the
+        question in every prompt (see `_relevance_messages`), so each
+        additional question on a chunk can be served from the endpoint's
+        prompt cache; cached token counts are tracked per endpoint in
+        `client_provider.prompt_cache_stats`.
+
+        Chunks and questions are scored concurrently; see `aquery_relevance`.
+        """
+        return self._run(self.aquery_relevance(chunks, questions, weights))
+
+    async def aquery_relevance(self, chunks, questions, weights=None) -> Dict:
+        """
+        Async counterpart of `query_relevance`. Every (chunk, question) pair is
+        submitted at once and bounded by `config.max_concurrency`.
+        """
+        self.logger.debug('asking:\n' + '\n'.join(questions))
+        chunks = self.prefilter_chunks(chunks, questions)
+        if not chunks:
+            return {'score': 0.0, 'response': 'No response'}
 
+        skipped = 0
+        if self.early_exit is None:
+            chunk_answers = await asyncio.gather(
+                *[self._aask_chunk(i, chunk, questions) for i, chunk in enumerate(chunks)]
+            )
+        else:
+            chunk_answers, skipped = await self._aask_chunks_early_exit(chunks, questions, weights)
+
+        results = await self._aconclude_relevance(chunks, chunk_answers, questions, weights)
+        if results is not None and self.early_exit is not None:
+            self.logger.info(f'early exit skipped {skipped} LLM calls')
+            results['llm_calls_skipped'] = skipped
+
+        return results
+
+    async def aquery_relevance_stream(self, chunks, questions, weights=None) -> Dict:
+        """
+        Like `aquery_relevance`, but takes an async iterator of chunks (see
+        `astream_pdf_chunks`) and submits each chunk's questions as soon as
+        it arrives rather than once the whole paper is chunked.
+
+        Returns:
+            dict: As `aquery_relevance`, or None if there were no chunks
+        """
+        texts, tasks = [], []
+        try:
+            async for chunk in chunks:
+                tasks.append(asyncio.ensure_future(self._aask_chunk(len(texts), chunk, questions)))
+                texts.append(chunk)
+        except BaseException:
+            for task in tasks:
+                task.cancel()
+            raise
+
+        if not texts:
+            return None
+
+        chunk_answers = await asyncio.gather(*tasks)
+        return await self._aconclude_relevance(texts, chunk_answers, questions, weights)
+
+    async def _aconclude_relevance(self, chunks, chunk_answers, questions, weights=None):
+        """
+        Scores the answers for every chunk, explains the relevant ones and
+        builds the result, or returns None if no chunk got a valid answer.
+        """
+        # If no valid responses, return None
+        if not any(answers and any(a is not None for a in answers)
+                   for answers in chunk_answers):
+            return None
+
+        scores, relevant_answers = self._score_answers(chunk_answers, questions, weights)
+        relevant_answers = await self._aexplain(lambda i, j: chunks[i], questions,
+                                                scores, relevant_answers)
+        results = await self._afinalize_relevance(scores, relevant_answers, questions)
+        if self.config.cascade_model:
+            self.logger.info(f'cascade: {self.cascade_stats}')
+
+        return results
+
+    async def aquery_relevance_retrieval(self, content, questions, weights=None) -> Dict:
+        """
+        Scores a paper by asking each question once, against only the
+        passages `self.retriever` ranks most similar to it. The retrieved
+        passages are treated as a single chunk when scoring.
+        """
+        retrieved = await asyncio.to_thread(self.retriever.retrieve, content, questions)
+        answers = await asyncio.gather(*[
+            self._aask_chunk(j, '\n\n'.join(passages), [question], multi_question=False)
+            for j, (passages, question) in enumerate(zip(retrieved, questions))
+        ])
+        chunk_answers = [[None if answer is None else answer[0] for answer in answers]]
+
+        if not any(a is not None for a in chunk_answers[0]):
+            return None
+
+        scores, relevant_answers = self._score_answers(chunk_answers, questions, weights)
+        relevant_answers = await self._aexplain(lambda i, j: '\n\n'.join(retrieved[j]), questions,
+                                                scores, relevant_answers)
+        return await self._afinalize_relevance(scores, relevant_answers, questions)
+
+    def screen_documents(self, documents: Dict[str, str], questions: List[str],
+                         weights: Union[List[float], None]=None) -> Dict[str, Dict]:
+        """
+        Scores many short documents (abstracts, registry rows, see
+        `packing.read_registry`) by packing up to `config.packing_max_tokens`
+        of them into each call and asking every question once per pack.
+
+        Args:
+            documents (dict): Document text keyed by id (e.g. DOI)
+            questions (list): The questions to score against
+            weights (list, optional): Question weights, uniform if not provided
+
+        Returns:
+            dict: `query_relevance`-style result (or None) keyed by document id
+        """
+        return self._run(self.ascreen_documents(documents, questions, weights))
+
+    async def ascreen_documents(self, documents, questions, weights=None):
+        """
+        Async counterpart of `screen_documents`. Packs are submitted
+        concurrently; documents a packed response does not cover are asked
+        again on their own.
+        """
+        packer = DocumentPacker(max_tokens=self.config.packing_max_tokens,
+                                count_tokens=self._count_tokens)
+        packs = packer.pack(documents)
+        numbered = '\n'.join(f'{j+1}. {question}' for j, question in enumerate(questions))
+        self.logger.info(f'screening {len(documents)} documents in {len(packs)} packed calls')
+
+        async def screen(pack):
+            text = None
+            try:
+                with tag(stage='relevance', question=MULTI_QUESTION_TAG):
+                    response = await self._acomplete(
+                        model=self.config.openai_model,
+                        messages=[{'role': 'user',
+                                   'content': PACKED_RELEVANCE.format(DOCUMENTS=packer.format(pack),
+                                                                      QUESTIONS=numbered)}],
+                        temperature=0.0,
+                    )
+                text = response.choices[0].message.content
             except Exception as e:
-                self.logger.warn(f"Error processing chunk {i+1}: {e}")
+                self.logger.warn(f'Error screening a pack of {len(pack)} documents: {e}')
+
+            answers = packer.parse(text, list(pack), len(questions))
+            missing = [doc_id for doc_id, doc_answers in answers.items() if doc_answers is None]
+            if missing:
+                self.logger.warn(f'{len(missing)}/{len(pack)} documents missing from the packed '
+                                 f'response, asking them one by one')
+                self.client_provider.metrics.count('unpacked_documents', len(missing))
+
+                async def ask(doc_id):
+                    with tag(paper=doc_id):
+                        return await self._aask_chunk(0, pack[doc_id], questions,
+                                                      multi_question=False)
+
+                for doc_id, doc_answers in zip(missing, await asyncio.gather(*[ask(doc_id)
+                                                                             for doc_id in missing])):
+                    answers[doc_id] = doc_answers
+            return answers
+
+        async def finalize(doc_id, answers):
+            if not answers or all(answer is None for answer in answers):
+                return doc_id, None
+            with tag(paper=doc_id):
+                scores, relevant_answers = self._score_answers([answers], questions, weights)
+                return doc_id, await self._afinalize_relevance(scores, relevant_answers, questions)
+
+        answers = {}
+        for pack_answers in await asyncio.gather(*[screen(pack) for pack in packs]):
+            answers.update(pack_answers)
+
+        return dict(await asyncio.gather(*[finalize(doc_id, doc_answers)
+                                           for doc_id, doc_answers in answers.items()]))
+
+    def prefilter_chunks(self, chunks, questions):
+        """
+        Applies `self.prefilter`, if any, and logs the tokens it saved.
+        """
+        if self.prefilter is None:
+            return chunks
+
+        kept = self.prefilter.filter(chunks, questions)
+        tokens = sum(map(count_tokens, chunks))
+        tokens_kept = sum(map(count_tokens, kept))
+        self.prefilter_stats.update({'chunks': len(chunks), 'chunks_kept': len(kept),
+                                     'tokens': tokens, 'tokens_kept': tokens_kept})
+        self.logger.info(f'prefilter kept {len(kept)}/{len(chunks)} chunks '
+                         f'({tokens_kept}/{tokens} tokens per question)')
+        return kept
+
+    async def _aask_chunks_early_exit(self, chunks, questions, weights=None):
+        """
+        Scores chunks in order until the relevance verdict is decided, then
+        applies the `early_exit` policy to the rest.
+
+        Returns:
+            tuple: (answers per scored chunk, number of LLM calls skipped)
+        """
+        per_question = self.config.relevance_mode != 'multi_question'
+        calls_per_chunk = len(questions) if per_question else 1
+        chunk_answers, skipped = [], 0
+        for i, chunk in enumerate(chunks):
+            scores, relevant_answers = self._score_answers(chunk_answers, questions, weights)
+            if not self._is_relevant(scores, relevant_answers):
+                chunk_answers.append(await self._aask_chunk(i, chunk, questions))
                 continue
-        
-        # If no valid responses, return None
-        if not any(chunk_responses):
+
+            remaining = [j for j in range(len(questions))
+                         if all(answers[j] is None for answers in relevant_answers)]
+            if self.early_exit == 'stop' or not remaining:
+                skipped += calls_per_chunk * (len(chunks) - i)
+                break
+
+            answers = await self._aask_chunk(i, chunk, [questions[j] for j in remaining])
+            chunk_answers.append(None if answers is None else
+                                 [answers[remaining.index(j)] if j in remaining else None
+                                  for j in range(len(questions))])
+            if per_question:
+                skipped += len(questions) - len(remaining)
+
+        return chunk_answers, skipped
+
+    async def _aask_chunk(self, i, chunk, questions, multi_question=None):
+        """
+        Returns the answer text for each question on a single chunk, or None
+        if the chunk could not be scored. `multi_question` defaults to the
+        configured relevance_mode.
+        """
+        if multi_question is None:
+            multi_question = self.config.relevance_mode == 'multi_question'
+
+        try:
+            if self.config.relevance_mode == 'logprob':
+                responses = await self.aask_llm_about_relevance(chunk, questions, classify=True)
+                return [self._p_yes(response) for response in responses]
+
+            if multi_question:
+                responses = await self.aask_llm_about_relevance(chunk, questions,
+                                                                multi_question=True)
+                answers = self._parse_verdicts(responses[0], len(questions))
+                if answers is not None:
+                    self.logger.info(f'verdicts for chunk {i+1}: {answers}')
+                    return answers
+
+                self.logger.warn(f'Could not parse verdicts for chunk {i+1}, '
+                                 f'falling back to one call per question')
+
+            responses = await self.aask_llm_about_relevance(chunk, questions)
+        except Exception as e:
+            # only reached once the provider's retries are exhausted
+            self.logger.warn(f"Error processing chunk {i+1}: {e}")
+            self.client_provider.metrics.count('dropped_chunks')
             return None
-    
-        # Determine overall relevance
-        if any([score > self.relevancy_cutoff for score in scores]):
-            is_relevant = True
-        elif sum(scores) > self.relevancy_cutoff:
-            is_relevant = True
-        else:
-            is_relevant = False
-            results = {'score': 0.0, 'response': 'No response'}
-            
-        # Create a combined response
-        if is_relevant:
-            results = {'score': scores[i]}
-
-            As, Qs = [], []
-            for i, answer in enumerate(relevant_answers):
-                for j, ans in enumerate(answer):
-                    if ans is not None:
-                        As.append(ans)
-                        Qs.append(questions[j])
-
-            if len(As) > 1: # multiple answers must be synthesized together
-                response = self.synthesize_response(As, Qs)
-                synth_response = response
-
-                if synth_response is None: # failed to synthesize an answer
-                    synth_response = '\n'.join(As)
-
-                results.update(
-                    {
-                        'response': synth_response
-                    }
-                )
-            elif As: # only one answer
-                results.update(
-                    {
-                        'response': As[0]
-                    }
-                )
-            else: # no answers
-                results.update(
-                    {
-                        'response': 'No response'
-                    }
-                )
+
+        answers = []
+        paper = current_tags().get('paper')
+        for question, response in zip(questions, responses):
+            if response and response.choices:
+                answer = response.choices[0].message.content
+                self.logger.debug(f'paper={paper} chunk={i+1} question={question!r}: {answer}')
+                answers.append(answer)
+            else:
+                answers.append(None)
+
+        return answers
+
+    def _score_answers(self, chunk_answers, questions, weights=None):
+        """
+        Scores each chunk from its per-question answers and collects the
+        answers that came back relevant, indexed as [chunk][question].
+        Answers are either text ("Yes. ..."/"No. ...") or, in logprob mode,
+        P(Yes) as a float, which contributes its probability to the score
+        and counts as relevant when Yes is the likelier answer.
+        """
+        scores = [0 for _ in range(len(chunk_answers))]
+        relevant_answers = [[None for _ in range(len(questions))] for _ in range(len(chunk_answers))]
+        for i, answers in enumerate(chunk_answers):
+            for j, answer in enumerate(answers or []):
+                if answer is None:
+                    continue
+
+                if isinstance(answer, float):
+                    p_yes = answer
+                else:
+                    p_yes = 1. if answer.lower().startswith('yes') else 0.
+
+                if weights is None:
+                    scores[i] += p_yes / len(questions)
+                else:
+                    scores[i] += p_yes * weights[j] / sum(weights)
+
+                if p_yes >= .5:
+                    relevant_answers[i][j] = answer
+
+        return scores, relevant_answers
+
+    def _is_relevant(self, scores, relevant_answers):
+        # with P(Yes) scores, low probabilities summed over many chunks can pass
+        # the cutoff, so at least one answer must also lean Yes
+        if not any(answer is not None for answers in relevant_answers for answer in answers):
+            return False
+        return (any([score > self.relevancy_cutoff for score in scores])
+                or sum(scores) > self.relevancy_cutoff)
+
+    async def _aexplain(self, content, questions, scores, relevant_answers):
+        """
+        Replaces the P(Yes) values left by logprob classification with
+        explanations. Only relevant papers get the second call, and only for
+        the likely-Yes questions on chunks above the cutoff (or on every chunk
+        when only their combined score clears it). `content(i, j)` returns
+        the text question j was asked about on chunk i.
+        """
+        pending = [(i, j) for i, answers in enumerate(relevant_answers)
+                   for j, answer in enumerate(answers) if isinstance(answer, float)]
+        if not pending:
+            return relevant_answers
+
+        explained = [[None if isinstance(answer, float) else answer for answer in answers]
+                     for answers in relevant_answers]
+        if not self._is_relevant(scores, relevant_answers):
+            return explained
+
+        above = {i for i, score in enumerate(scores) if score > self.relevancy_cutoff}
+        if above:
+            pending = [(i, j) for i, j in pending if i in above]
+
+        async def explain(i, j):
+            with tag(stage='explanation', question=questions[j]):
+                try:
+                    response = await self._acomplete(
+                        model=self.config.openai_model,
+                        messages=self._relevance_messages(content(i, j), questions[j]),
+                        temperature=0.0,
+                    )
+                    return response.choices[0].message.content
+                except Exception as e:
+                    self.logger.warn(f'Error explaining chunk {i+1}: {e}')
+                    return None
+
+        self.logger.info(f'requesting {len(pending)} explanations')
+        for (i, j), text in zip(pending, await asyncio.gather(*[explain(i, j) for i, j in pending])):
+            explained[i][j] = text or f'Yes (P={relevant_answers[i][j]:.2f})'
+
+        return explained
+
+    async def _afinalize_relevance(self, scores, relevant_answers, questions):
+        """
+        Determines overall relevance from the chunk scores and builds the
+        combined {'score', 'response'} result.
+        """
+        if not self._is_relevant(scores, relevant_answers):
+            return {'score': 0.0, 'response': 'No response'}
+
+        results = {'score': scores[-1]}
+
+        As, Qs = [], []
+        for answers in relevant_answers:
+            for j, ans in enumerate(answers):
+                if ans is not None:
+                    As.append(ans)
+                    Qs.append(questions[j])
+
+        if len(As) > 1: # multiple answers must be synthesized together
+            synth_response = await self.asynthesize_response(As, Qs)
+
+            if synth_response is None: # failed to synthesize an answer
+                synth_response = '\n'.join(As)
+
+            results.update({'response': synth_response})
+        elif As: # only one answer
+            results.update({'response': As[0]})
+        else: # no answers
+            results.update({'response': 'No response'})
 
         return results
 
-    def ask_llm_about_relevance(self, content, questions):
+    def ask_llm_about_relevance(self, content, questions, multi_question=False):
         """
         Asks the LLM whether a given content is relevant to answering a specific question.
     
@@ -230,11 +972,14 @@ class LitScanner:
     
         Args:
             content (str): The text content to analyze (typically from a scientific paper)
-            question (str): The question to evaluate relevance against
+            questions (list): The questions to evaluate relevance against
+            multi_question (bool): If True, send the content once with all questions and
+                                   ask for a JSON array of verdicts (see `_parse_verdicts`)
     
         Returns:
-            ChatCompletion: The response from the LLM containing relevance assessment.
-                           The response will include a Yes/No answer followed by a brief explanation.
+            list: ChatCompletion responses from the LLM containing relevance assessments, one
+                  per question, or a single response holding every verdict if multi_question.
+                  Each answer is a Yes/No followed by a brief explanation.
     
         Example:
             >>> content = "This paper discusses the role of RTCB in RNA ligation..."
@@ -248,61 +993,249 @@ class LitScanner:
               typical LLM token limits
             - Uses temperature=0.0 for more consistent, deterministic responses
             - Configured to use the LLM settings from LitScanConfig
+            - Pacing is left to the client provider's rate limiter
         """
-        self.logger.info(f'establishing client on base_url: {self.config.openai_base_url}')
-        client = OpenAI(
-            api_key=self.config.openai_api_key,
-            base_url=self.config.openai_base_url
-        )
-    
         self.logger.info(f'requesting chat.completion')
+        if multi_question:
+            with tag(stage='relevance', question=MULTI_QUESTION_TAG):
+                return [self._complete(
+                    model=self.config.openai_model,
+                    messages=self._multi_relevance_messages(content, questions),
+                    temperature=0.0,
+                )]
+
         responses = []
         for question in questions:
-            chat_response = client.chat.completions.create(
-                model=self.config.openai_model,
-                messages=[
-                    {'role': 'user', 'content': f'Please read the following content from a scientific \
-                     paper and then answer a question. Content: {content} ... \n\n Is this passage relevant \
-                     to answering the question: "{question}"? Please respond with "Yes" or "No" followed \
-                     by a brief explanation.'}
-                    #{"role": "user", "content": f"Given the following content from a scientific paper, \
-                    #is it relevant to answering the question: '{question}'? \
-                    #Please respond with 'Yes' or 'No' followed by a brief explanation.\n\nContent: {content}..."},
-                ],
-                temperature=0.0,
-            )
+            with tag(stage='relevance', question=question):
+                chat_response = self._complete(
+                    model=self.config.openai_model,
+                    messages=self._relevance_messages(content, question),
+                    temperature=0.0,
+                )
 
             responses.append(chat_response)
-            sleep(1)
 
         return responses
 
+    async def aask_llm_about_relevance(self, content, questions, multi_question=False,
+                                       classify=False):
+        """
+        Async counterpart of `ask_llm_about_relevance`. The first question is
+        asked on its own so the endpoint has the chunk prefix cached, then the
+        remaining questions are submitted concurrently. With `classify`, each
+        question only gets a one-token answer with its logprobs (see `_p_yes`).
+        """
+        if classify:
+            options = {'max_tokens': 1, 'logprobs': True, 'top_logprobs': 5}
+            stage = 'classify'
+        else:
+            options, stage = {}, 'relevance'
+
+        if multi_question:
+            with tag(stage='relevance', question=MULTI_QUESTION_TAG):
+                return [await self._acomplete(
+                    model=self.config.openai_model,
+                    messages=self._multi_relevance_messages(content, questions),
+                    temperature=0.0,
+                )]
+
+        async def ask(question):
+            with tag(stage=stage, question=question):
+                return await self._acascade(self._relevance_messages(content, question), **options)
+
+        self.logger.info(f'requesting {len(questions)} chat.completions')
+        first = await ask(questions[0])
+        rest = await asyncio.gather(*[ask(question) for question in questions[1:]])
+        return [first, *rest]
+
+    async def _acascade(self, messages, **options):
+        """
+        Answers a single relevance question. With `config.cascade_model` set,
+        the small model(s) answer first with logprobs, and the question is
+        escalated to `config.openai_model` only when their P(Yes) margin is
+        below `config.cascade_margin`, they disagree, or a call failed. A
+        `config.cascade_audit_rate` share of confident answers is also sent to
+        the large model to measure agreement (see `self.cascade_stats`).
+        """
+        request = {'messages': messages, 'temperature': 0.0, **options}
+        if not self.config.cascade_model:
+            return await self._acomplete(model=self.config.openai_model, **request)
+
+        small_models = self.config.cascade_model
+        if isinstance(small_models, str):
+            small_models = [small_models]
+
+        async def ask_small(model):
+            try:
+                return await self._acomplete(model=model, **{**request, 'logprobs': True,
+                                                             'top_logprobs': 5})
+            except Exception as e:
+                self.logger.warn(f'Error asking {model}: {e}')
+                return None
+
+        small = await asyncio.gather(*[ask_small(model) for model in small_models])
+        p_small = [self._p_yes(response) for response in small]
+        reason = escalation_reason(p_small, self.config.cascade_margin)
+        audited = reason is None and random.random() < self.config.cascade_audit_rate
+        if reason is None and not audited:
+            self.cascade_stats.record(None)
+            return small[0]
+
+        large = await self._acomplete(model=self.config.openai_model, **request)
+        agreed = None
+        if reason != 'failed':
+            p_large = self._p_yes(large)
+            if p_large is not None:
+                agreed = (p_large >= .5) == (sum(p_small) / len(p_small) >= .5)
+
+        self.cascade_stats.record(reason, audited, agreed)
+        if reason is not None:
+            self.client_provider.metrics.count('cascade_escalations')
+            return large
+        return small[0]
+
+    @staticmethod
+    def _relevance_messages(content, question):
+        """
+        Builds the relevance prompt with the instructions and the chunk ahead
+        of the question, so every question on a chunk shares a byte-stable
+        prefix that the endpoint's prompt cache can reuse.
+        """
+        return LitScanner._content_prefix(content) + [
+            {'role': 'user', 'content': RELEVANCE_QUESTION.format(QUESTION=question)}
+        ]
+
+    @staticmethod
+    def _multi_relevance_messages(content, questions):
+        numbered = '\n'.join(f'{j+1}. {question}' for j, question in enumerate(questions))
+        return LitScanner._content_prefix(content) + [
+            {'role': 'user', 'content': MULTI_QUESTION_RELEVANCE.format(QUESTIONS=numbered)}
+        ]
+
+    @staticmethod
+    def _content_prefix(content):
+        return [
+            {'role': 'system', 'content': RELEVANCE_SYSTEM},
+            {'role': 'user', 'content': RELEVANCE_CONTENT.format(CONTENT=content)},
+        ]
+
+    @staticmethod
+    def _p_yes(response) -> Optional[float]:
+        """
+        P(Yes) from a one-token classification, normalised over the Yes/No
+        candidates in `top_logprobs`. Falls back to the answer text (1.0 or
+        0.0) when the endpoint returns no logprobs.
+        """
+        try:
+            choice = response.choices[0]
+        except (AttributeError, IndexError):
+            return None
+
+        try:
+            top_logprobs = choice.logprobs.content[0].top_logprobs
+        except (AttributeError, IndexError, TypeError):
+            top_logprobs = []
+
+        p = {'yes': 0., 'no': 0.}
+        for candidate in top_logprobs:
+            token = candidate.token.strip().lower()
+            if token in p:
+                p[token] += math.exp(candidate.logprob)
+
+        if p['yes'] + p['no'] > 0:
+            return p['yes'] / (p['yes'] + p['no'])
+        return 1. if (choice.message.content or '').strip().lower().startswith('yes') else 0.
+
+    @staticmethod
+    def _parse_verdicts(response, n_questions) -> Optional[List[str]]:
+        """
+        Parses a multi-question response into one answer per question, worded
+        like the per-question answers ("Yes. <explanation>"). Returns None if
+        the response does not match `RELEVANCE_VERDICTS_SCHEMA`.
+        """
+        try:
+            text = response.choices[0].message.content.strip()
+        except (AttributeError, IndexError):
+            return None
+
+        # tolerate the array being wrapped in a markdown code fence
+        if text.startswith('```'):
+            text = text.strip('`').split('\n', 1)[-1]
+
+        try:
+            verdicts = json.loads(text)
+        except json.JSONDecodeError:
+            return None
+
+        if not isinstance(verdicts, list) or len(verdicts) != n_questions:
+            return None
+
+        answers = [None] * n_questions
+        for verdict in verdicts:
+            if not isinstance(verdict, dict):
+                return None
+
+            for key, spec in RELEVANCE_VERDICTS_SCHEMA['items']['properties'].items():
+                value = verdict.get(key)
+                if not isinstance(value, _JSON_TYPES[spec['type']]) or \
+                        (spec['type'] == 'integer' and isinstance(value, bool)):
+                    return None
+
+            j = verdict['question_index'] - 1
+            if not 0 <= j < n_questions or answers[j] is not None:
+                return None
+
+            answers[j] = f"{'Yes' if verdict['relevant'] else 'No'}. {verdict['explanation']}"
+
+        return answers
+
     def synthesize_response(self, responses, questions):
-        self.logger.info(f'establishing client on base_url: {self.config.openai_base_url}')
-        client = OpenAI(
-            api_key=self.config.openai_api_key,
-            base_url=self.config.openai_base_url
-        )
-    
         self.logger.info(f'requesting chat.completion')
-    
-        content = []
-        for question, response in zip(questions, responses):
-            if 'No response' in response or response == None:
-                continue
-            else:
-                content.append(f'Question: {question}\nResponse: {response}\n')
+        return self._run(self.asynthesize_response(responses, questions))
 
-        content = '\n'.join(content)
-        
-        chat_response = client.chat.completions.create(
+    async def asynthesize_response(self, responses, questions):
+        """
+        Combines the relevant answers into one summary. Answer sets larger
+        than `config.synthesis_max_tokens` are reduced hierarchically (see
+        `synthesis.HierarchicalSynthesizer`) instead of in one long prompt.
+        """
+        pairs = self._synthesis_pairs(responses, questions)
+        synthesizer = self._synthesizer(self._merge_messages)
+        with tag(stage='synthesis'):
+            if sum(synthesizer.count_tokens(pair) for pair in pairs) > synthesizer.max_group_tokens:
+                return await synthesizer.asynthesize(pairs)
+
+            return await self._asynthesis_completion(self._merge_messages(pairs))
+
+    def synthesize_papers(self, results: Dict[str, Dict]) -> Optional[str]:
+        return self._run(self.asynthesize_papers(results))
+
+    async def asynthesize_papers(self, results: Dict[str, Dict]) -> Optional[str]:
+        """
+        Condenses the responses of every relevant paper, keyed by PDF filename
+        or PMC id as returned by `scan_pdfs`, into one summary that cites the
+        PDFs inline (`CHUNK_MERGE_2`), reducing level by level as needed.
+        """
+        summaries = {}
+        for key, result in results.items():
+            if result and result.get('response') not in (None, 'No response'):
+                pdf_id = os.path.basename(key)
+                summaries[pdf_id if pdf_id.endswith('.pdf') else f'{pdf_id}.pdf'] = result['response']
+
+        with tag(stage='synthesis'):
+            return await self._synthesizer().asynthesize_papers(summaries)
+
+    def _synthesizer(self, build_messages=None):
+        kwargs = {'build_messages': build_messages} if build_messages is not None else {}
+        return HierarchicalSynthesizer(self._asynthesis_completion,
+                                       max_group_tokens=self.config.synthesis_max_tokens,
+                                       count_tokens=self._count_tokens,
+                                       logger=self.logger, **kwargs)
+
+    async def _asynthesis_completion(self, messages):
+        chat_response = await self._acomplete(
             model=self.config.openai_model,
-            messages=[
-                {'role': 'user', 'content': f'Please read the following content \
-                 which consists of pairs of questions and responses regarding a \
-                 scientific paper. Combine these responses into a single summary \
-                 which still answers all questions provided. Content:\n{content} ...'}
-            ],
+            messages=messages,
             temperature=0.0,
         )
 
@@ -310,49 +1243,117 @@ class LitScanner:
             return chat_response.choices[0].message.content
         except AttributeError:
             return None
+
+    @staticmethod
+    def _count_tokens(text):
+        return count_tokens(text)
+
+    @staticmethod
+    def _synthesis_pairs(responses, questions):
+        content = []
+        for question, response in zip(questions, responses):
+            if response == None or 'No response' in response:
+                continue
+            else:
+                content.append(f'Question: {question}\nResponse: {response}\n')
+        return content
+
+    @staticmethod
+    def _merge_messages(texts):
+        content = '\n'.join(texts)
+        return [
+            {'role': 'user', 'content': f'Please read the following content \
+             which consists of pairs of questions and responses regarding a \
+             scientific paper. Combine these responses into a single summary \
+             which still answers all questions provided. Content:\n{content} ...'}
+        ]
+
+    def _complete(self, **request):
+        """Creates a chat completion on the shared client for `self.config`."""
+        return self.client_provider.complete(self.config.openai_api_key,
+                                             self._endpoint(),
+                                             **request)
+
+    async def _acomplete(self, **request):
+        """
+        Async counterpart of `_complete`, holding one of the
+        `config.max_concurrency` request slots while it waits.
+        """
+        async with self._semaphore():
+            return await self.client_provider.acomplete(self.config.openai_api_key,
+                                                        self._endpoint(),
+                                                        **request)
+
+    def _endpoint(self):
+        """
+        The configured base_url, or a shared `LoadBalancer` when
+        `config.openai_base_urls` lists several replicas. Raise
+        `max_concurrency` with the number of replicas to keep them all busy.
+        """
+        if not self.config.openai_base_urls:
+            return self.config.openai_base_url
+        return self.client_provider.load_balancer(self.config.openai_api_key,
+                                                  self.config.openai_base_urls,
+                                                  self.config.openai_base_url_weights)
+
+    def _semaphore(self):
+        """Returns the request semaphore bound to the running event loop."""
+        loop = asyncio.get_running_loop()
+        if self._aio is None or self._aio[0] is not loop:
+            self._aio = (loop, asyncio.Semaphore(self.config.max_concurrency))
+
+        return self._aio[1]
+
+    def _run(self, coro):
+        """
+        Runs a coroutine to completion from synchronous code, on the client
+        provider's long-lived event loop so that connections are reused
+        across calls. This also works inside an event loop (e.g. Jupyter).
+        """
+        return self.client_provider.run(coro)
     
     @staticmethod
     def _chunk_text(text: str, chunk_size=2048*32, overlap_tokens=2048*16) -> list[str]:
         """Split text into overlapping chunks based on token count"""
-        chunks = []
-        tokenizer = tiktoken.encoding_for_model("gpt-4o")
-        tokens = tokenizer.encode(text)
-    
-        start = 0
-        while start < len(tokens):
-            # Get chunk of tokens
-            end = start + chunk_size
-            chunk_tokens = tokens[start:end]
-    
-            # Convert chunk tokens back to text
-            chunk_text = tokenizer.decode(chunk_tokens)
-            chunks.append(chunk_text)
+        return chunk_text(text, chunk_size=chunk_size, overlap=overlap_tokens)
     
-            # Move start position, accounting for overlap
-            start = end - overlap_tokens
-    
-        return chunks
-    
-    def extract_pdf_text(self, pdf_filename):
+    def extract_pdf_text(self, pdf_filename, max_pages=None, max_tokens=None):
         """
         Extracts text content from a PDF file.
     
         Args:
             pdf_filename (str): Path to the PDF file
+            max_pages (int, optional): Only extract this many pages from the start
+            max_tokens (int, optional): Stop extracting once this many tokens are read
     
         Returns:
             str: Extracted text content from the PDF, or None if extraction fails
         """
-        try:
-            doc = pymupdf.open(pdf_filename)
-            content = ''
-            for page in doc:
-                content += page.get_text()
+        pages = self.extract_pdf_pages(pdf_filename, max_pages=max_pages, max_tokens=max_tokens)
+        return ''.join(pages) if pages else None
 
-            return content if content else None
+    def extract_pdf_pages(self, pdf_filename, max_pages=None, max_tokens=None):
+        """
+        Extracts the text of each page of a PDF file, from `text_cache` if
+        it was extracted before. The document is opened lazily, so with
+        `max_pages` or `max_tokens` later pages are never parsed.
+
+        Args:
+            pdf_filename (str or bytes): Path to the PDF file, or its bytes
+            max_pages (int, optional): Only extract this many pages from the start
+            max_tokens (int, optional): Stop extracting once this many tokens are read
+
+        Returns:
+            list: Text of each page, or None if extraction fails or finds no text
+        """
+        try:
+            pages = extract_pages(pdf_filename, self.text_cache,
+                                  max_pages=max_pages, max_tokens=max_tokens)
+            return pages if any(pages) else None
 
         except Exception as e:
-            self.logger.warn(f"Error extracting text from {pdf_filename}: {e}")
+            name = pdf_filename if isinstance(pdf_filename, str) else 'in-memory PDF'
+            self.logger.warn(f"Error extracting text from {name}: {e}")
             return None
         
     def extract_html_text(self, html_content):
@@ -388,9 +1389,21 @@ class LitScanner:
 class PMCScanner(LitScanner):
     def __init__(self, logger: Logger, cfg: LitScanConfig, 
                  outdir: str='papers', chunk_size: int=2048*16,
-                 chunk_overlap: int=2048*8, relevancy_cutoff: float=.1):
+                 chunk_overlap: int=2048*8, relevancy_cutoff: float=.1,
+                 client_provider: Union[ClientProvider, None]=None,
+                 early_exit: Union[str, None]=None,
+                 prefilter: Union[BM25Prefilter, None]=None,
+                 retriever=None,
+                 chunker: Union[SectionChunker, None]=None,
+                 text_cache: Union[TextCache, None]=None):
         super(PMCScanner, self).__init__(logger, None, outdir, chunk_size, 
-                                         chunk_overlap, relevancy_cutoff)
+                                         chunk_overlap, relevancy_cutoff,
+                                         client_provider=client_provider,
+                                         early_exit=early_exit,
+                                         prefilter=prefilter,
+                                         retriever=retriever,
+                                         chunker=chunker,
+                                         text_cache=text_cache)
         self.config = cfg
 
     def get_ids(self, term, retmax=None):
@@ -542,9 +1555,184 @@ class PMCScanner(LitScanner):
         return arr
 
 
+    def get_abstracts(self, ids, batch_size=200):
+        """
+        Fetches titles and abstracts for a list of PMC IDs in bulk from
+        PubMed, `batch_size` IDs per request. PMC IDs are mapped to PMIDs
+        with the PMC ID converter, then abstracts are fetched with efetch,
+        so no full article text is downloaded.
+
+        Args:
+            ids (list): PMC IDs as returned by `get_ids`
+            batch_size (int, optional): IDs per request (at most 200)
+
+        Returns:
+            dict: {'title': str, 'abstract': str} keyed by PMC ID; IDs that could
+                  not be fetched or have no PubMed record are missing
+        """
+        abstracts = {}
+        for start in range(0, len(ids), batch_size):
+            pmids = self._get_pmids(ids[start:start + batch_size])
+            if not pmids:
+                continue
+
+            sleep(1)
+            try:
+                response = requests.post(EUTILS_URL + 'efetch.fcgi', timeout=60,
+                                         data={'db': 'pubmed', 'id': ','.join(pmids),
+                                               'rettype': 'abstract', 'retmode': 'xml'})
+            except requests.RequestException as e:
+                self.logger.warn(f'Error fetching abstracts: {e}')
+                continue
+            if response.status_code != 200:
+                self.logger.warn(f"Error: {response.status_code} - {response.text}")
+                continue
+
+            try:
+                root = ET.fromstring(response.content)
+            except ET.ParseError as e:
+                self.logger.warn(f'Could not parse efetch response: {e}')
+                continue
+
+            for article in root.iter('PubmedArticle'):
+                pmid = article.findtext('MedlineCitation/PMID', '').strip()
+                if pmid not in pmids:
+                    continue
+
+                title = article.find('MedlineCitation/Article/ArticleTitle')
+                sections = []
+                for text in article.findall('MedlineCitation/Article/Abstract/AbstractText'):
+                    label = text.get('Label')
+                    text = ' '.join(''.join(text.itertext()).split())
+                    sections.append(f'{label}: {text}' if label else text)
+                abstracts[pmids[pmid]] = {
+                    'title': ' '.join(''.join(title.itertext()).split()) if title is not None else '',
+                    'abstract': ' '.join(sections),
+                }
+
+        self.logger.info(f'fetched {len(abstracts)}/{len(ids)} abstracts')
+        return abstracts
+
+    def _get_pmids(self, ids):
+        """
+        Maps up to 200 PMC IDs to PMIDs with the PMC ID converter.
+
+        Returns:
+            dict: PMC ID as given, keyed by PMID; IDs without a PMID are missing
+        """
+        wanted = {'PMC' + str(pmcid).upper().removeprefix('PMC'): pmcid for pmcid in ids}
+        sleep(1)
+        try:
+            response = requests.get(IDCONV_URL, timeout=60,
+                                    params={'ids': ','.join(wanted), 'format': 'json',
+                                            'tool': 'litscan'})
+            records = response.json().get('records', []) if response.status_code == 200 else None
+        except (requests.RequestException, ValueError) as e:
+            self.logger.warn(f'Error mapping PMC IDs to PMIDs: {e}')
+            return {}
+        if records is None:
+            self.logger.warn(f"Error: {response.status_code} - {response.text}")
+            return {}
+
+        return {str(record['pmid']): wanted[record['pmcid'].upper()] for record in records
+                if record.get('pmid') and record.get('pmcid', '').upper() in wanted}
+
+    def triage(self, ids, questions, weights=None, method='llm', min_score=0.):
+        """
+        Abstract-first triage: scores the title and abstract of every paper
+        before anything is downloaded, and returns only the IDs worth a full
+        scan. Papers whose abstract could not be fetched or scored are kept.
+
+        Args:
+            ids (list): PMC IDs as returned by `get_ids`
+            questions (list): The questions the full scan will ask
+            weights (list, optional): Question weights, uniform if not provided
+            method (str, optional): 'llm' for batched calls to
+                                    `config.triage_model`, or 'bm25' to rank
+                                    abstracts locally with a `BM25Prefilter`
+                                    using the synonyms of `self.prefilter` and
+                                    `config.triage_bm25_top_k`/`_threshold`
+            min_score (float, optional): Papers must score above this, where the
+                                         score is the weighted fraction of
+                                         questions the abstract looks relevant to
+
+        Returns:
+            list: The IDs that passed, in their original order
+        """
+        return self._run(self.atriage(ids, questions, weights, method, min_score))
+
+    async def atriage(self, ids, questions, weights=None, method='llm', min_score=0.):
+        """Async counterpart of `triage`."""
+        abstracts = await asyncio.to_thread(self.get_abstracts, ids)
+        documents = {pmcid: f"Title: {entry['title']}\nAbstract: {entry['abstract']}"
+                     for pmcid, entry in abstracts.items() if entry['abstract']}
+
+        if method == 'bm25':
+            # the chunk prefilter's top_k and threshold are tuned for the chunks of one paper
+            synonyms = self.prefilter.synonyms if self.prefilter is not None else None
+            prefilter = BM25Prefilter(synonyms=synonyms, threshold=self.config.triage_bm25_threshold,
+                                      top_k=self.config.triage_bm25_top_k)
+            pmcids = list(documents)
+            kept = {pmcids[i] for i in prefilter.keep(list(documents.values()), questions)}
+        elif method == 'llm':
+            pmcids = list(documents)
+            size = self.config.triage_batch_size
+            batches = await asyncio.gather(*[
+                self._atriage_batch({pmcid: documents[pmcid] for pmcid in pmcids[start:start + size]},
+                                    questions, weights)
+                for start in range(0, len(pmcids), size)
+            ])
+            kept = {pmcid for scores in batches for pmcid, score in scores.items()
+                    if score is None or score > min_score}
+        else:
+            raise ValueError(f'unknown triage method: {method}')
+
+        passed = [pmcid for pmcid in ids if pmcid not in documents or pmcid in kept]
+        self.client_provider.metrics.count('triage_dropped', len(ids) - len(passed))
+        self.logger.info(f'triage kept {len(passed)}/{len(ids)} papers '
+                         f'({len(ids) - len(documents)} without an abstract kept unscored)')
+        return passed
+
+    async def _atriage_batch(self, documents, questions, weights=None):
+        """
+        Scores a batch of abstracts with one LLM call. Returns the weighted
+        fraction of questions each paper looks relevant to, or None for
+        papers the response did not cover.
+        """
+        weights = weights or [1] * len(questions)
+        numbered = '\n'.join(f'{j+1}. {question}' for j, question in enumerate(questions))
+        packed = DocumentPacker.format(documents)
+        scores = dict.fromkeys(documents)
+        try:
+            with tag(stage='triage'):
+                response = await self._acomplete(
+                    model=self.config.triage_model or self.config.openai_model,
+                    messages=[{'role': 'user', 'content': TRIAGE_PROMPT.format(DOCUMENTS=packed,
+                                                                               QUESTIONS=numbered)}],
+                    temperature=0.0,
+                )
+            text = response.choices[0].message.content.strip()
+            if text.startswith('```'):
+                text = text.strip('`').split('\n', 1)[-1]
+            verdicts = json.loads(text)
+        except Exception as e:
+            self.logger.warn(f'Error triaging {len(documents)} abstracts, keeping them: {e}')
+            return scores
+
+        for verdict in verdicts if isinstance(verdicts, list) else []:
+            if (not isinstance(verdict, dict) or str(verdict.get('doc_id')) not in scores
+                    or not isinstance(verdict.get('questions'), list)):
+                continue
+            relevant = {j - 1 for j in verdict['questions']
+                        if isinstance(j, int) and 0 < j <= len(questions)}
+            scores[str(verdict['doc_id'])] = sum(weights[j] for j in relevant) / sum(weights)
+
+        return scores
+
 class StringDBScanner(LitScanner):
-    def __init__(self, logger=Logger, cfg=LitScanConfig):
-        super().__init__(logger)
+    def __init__(self, logger=Logger, cfg=LitScanConfig,
+                 client_provider: Union[ClientProvider, None]=None):
+        super().__init__(logger, client_provider=client_provider)
         self.config = cfg
 
     def get_ids(self, protein_name, output_format='json', optional_parameters=''):
@@ -0,0 +1,137 @@
+import hashlib
+import json
+import logging
+from openai.types.chat import ChatCompletion
+import sqlite3
+import threading
+import time
+from typing import Dict, Union
+
+class LLMCache:
+    """
+    Persistent, content-addressed cache of chat completions backed by SQLite.
+
+    Each entry is keyed on a SHA-256 of the full request (model, messages,
+    temperature and any other parameters), so re-running a scan only pays
+    for requests that actually changed. Entries older than `ttl` seconds are
+    treated as misses, and once the table holds more than `max_entries` the
+    least recently used entries are evicted. Access times of hits are
+    written in batches of `flush_every` rather than on every lookup.
+
+    Example usage:
+        cache = LLMCache('llm_cache.sqlite', ttl=30 * 24 * 3600)
+        provider = ClientProvider(cache=cache)
+    """
+    def __init__(self, path: str='llm_cache.sqlite', max_entries: int=100_000,
+                 ttl: Union[float, None]=None, flush_every: int=64,
+                 logger: Union[logging.Logger, None]=None):
+        self.path = path
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.flush_every = flush_every
+        self.logger = logger if logger is not None else logging.getLogger('litscan')
+        self.hits = 0
+        self.misses = 0
+        self._puts = 0
+        self._accessed: Dict[str, float] = {} # hits not yet written to the table
+
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute('PRAGMA journal_mode=WAL')
+        self._db.execute(
+            'CREATE TABLE IF NOT EXISTS responses ('
+            'key TEXT PRIMARY KEY, response TEXT NOT NULL, '
+            'created REAL NOT NULL, accessed REAL NOT NULL)'
+        )
+        self._db.execute('CREATE INDEX IF NOT EXISTS responses_accessed ON responses (accessed)')
+        self._db.commit()
+        self.evict()
+
+    @staticmethod
+    def key(request: dict) -> str:
+        """Hashes a chat.completions request into a cache key."""
+        blob = json.dumps(request, sort_keys=True, ensure_ascii=False, default=str)
+        return hashlib.sha256(blob.encode('utf8')).hexdigest()
+
+    def get(self, request: dict) -> Union[ChatCompletion, None]:
+        key = self.key(request)
+        now = time.time()
+        with self._lock:
+            row = self._db.execute('SELECT response, created FROM responses WHERE key = ?',
+                                   (key,)).fetchone()
+            if row is not None and self.ttl is not None and now - row[1] > self.ttl:
+                self._db.execute('DELETE FROM responses WHERE key = ?', (key,))
+                self._db.commit()
+                row = None
+
+            if row is None:
+                self.misses += 1
+                return None
+
+            self._accessed[key] = now
+            if len(self._accessed) >= self.flush_every:
+                self._flush_accessed()
+            self.hits += 1
+
+        self.logger.info(f'llm cache hit {key[:12]} ({self.hits} hits, {self.misses} misses)')
+        return ChatCompletion.model_validate_json(row[0])
+
+    def put(self, request: dict, response: ChatCompletion) -> None:
+        if not getattr(response, 'choices', None):
+            return
+
+        key = self.key(request)
+        now = time.time()
+        with self._lock:
+            self._accessed.pop(key, None)
+            self._db.execute('INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?)',
+                             (key, response.model_dump_json(), now, now))
+            self._db.commit()
+            self._puts += 1
+
+        # counting rows on every insert is wasteful, so only check periodically
+        if self._puts % 64 == 0:
+            self.evict()
+
+    def _flush_accessed(self) -> None:
+        """Writes pending access times; the caller holds `_lock`."""
+        if self._accessed:
+            self._db.executemany('UPDATE responses SET accessed = ? WHERE key = ?',
+                                 [(accessed, key) for key, accessed in self._accessed.items()])
+            self._db.commit()
+            self._accessed.clear()
+
+    def evict(self) -> int:
+        """Drops expired entries, then the least recently used beyond `max_entries`."""
+        with self._lock:
+            self._flush_accessed()
+            removed = 0
+            if self.ttl is not None:
+                removed += self._db.execute('DELETE FROM responses WHERE created < ?',
+                                            (time.time() - self.ttl,)).rowcount
+
+            excess = self._db.execute('SELECT COUNT(*) FROM responses').fetchone()[0] - self.max_entries
+            if excess > 0:
+                removed += self._db.execute(
+                    'DELETE FROM responses WHERE key IN '
+                    '(SELECT key FROM responses ORDER BY accessed LIMIT ?)', (excess,)
+                ).rowcount
+
+            self._db.commit()
+
+        if removed:
+            self.logger.info(f'llm cache evicted {removed} entries')
+        return removed
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.
+
+    def close(self) -> None:
+        with self._lock:
+            self._flush_accessed()
+            self._db.close()
+
+    def __repr__(self):
+        return f'LLMCache({self.path!r}, hits={self.hits}, misses={self.misses})'
@@ -0,0 +1,453 @@
+import asyncio
+import httpx
+from contextlib import contextmanager
+from llm_cache import LLMCache
+from load_balancer import LoadBalancer
+import logging
+from metrics import MetricsCollector
+from openai import AsyncOpenAI, DefaultAsyncHttpxClient, DefaultHttpxClient, OpenAI
+from rate_limit import RateLimiter
+from resilience import CircuitBreaker, RetryPolicy
+import threading
+import time
+from typing import Dict, List, Tuple, Union
+
+try:
+    import h2 # noqa: F401 (httpx only needs it to be importable)
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+ClientKey = Tuple[Union[str, None], Union[str, None]]
+AsyncClientKey = Tuple[Union[str, None], Union[str, None], asyncio.AbstractEventLoop]
+
+class ConnectionStats:
+    """
+    Counts how many requests opened a fresh connection versus reusing one
+    from the keep-alive pool.
+    """
+    def __init__(self):
+        self.requests = 0
+        self.new_connections = 0
+        self.reused_connections = 0
+        self._lock = threading.Lock()
+
+    def record(self, opened: bool) -> None:
+        with self._lock:
+            self.requests += 1
+            if opened:
+                self.new_connections += 1
+            else:
+                self.reused_connections += 1
+
+    @property
+    def reuse_rate(self) -> float:
+        return self.reused_connections / self.requests if self.requests else 0.
+
+    def __repr__(self):
+        return (f'ConnectionStats(requests={self.requests}, new={self.new_connections}, '
+                f'reused={self.reused_connections})')
+
+
+class PromptCacheStats:
+    """
+    Tracks how many prompt tokens an endpoint served from its prefix cache,
+    as reported in `usage.prompt_tokens_details.cached_tokens`.
+    """
+    def __init__(self):
+        self.requests = 0
+        self.prompt_tokens = 0
+        self.cached_tokens = 0
+        self._lock = threading.Lock()
+
+    def record(self, response) -> Tuple[int, int]:
+        usage = getattr(response, 'usage', None)
+        prompt_tokens = getattr(usage, 'prompt_tokens', None) or 0
+        details = getattr(usage, 'prompt_tokens_details', None)
+        cached_tokens = getattr(details, 'cached_tokens', None) or 0
+        with self._lock:
+            self.requests += 1
+            self.prompt_tokens += prompt_tokens
+            self.cached_tokens += cached_tokens
+        return prompt_tokens, cached_tokens
+
+    @property
+    def hit_rate(self) -> float:
+        return self.cached_tokens / self.prompt_tokens if self.prompt_tokens else 0.
+
+    def __repr__(self):
+        return (f'PromptCacheStats(requests={self.requests}, prompt_tokens={self.prompt_tokens}, '
+                f'cached_tokens={self.cached_tokens})')
+
+
+class _ConnectionTrace:
+    """httpcore `trace` extension noting whether a request had to connect."""
+    def __init__(self):
+        self.opened = False
+
+    def __call__(self, event_name, info):
+        if event_name == 'connection.connect_tcp.complete':
+            self.opened = True
+
+
+class _AsyncConnectionTrace(_ConnectionTrace):
+    async def __call__(self, event_name, info):
+        super().__call__(event_name, info)
+
+
+class ClientProvider:
+    """
+    Hands out long-lived OpenAI and AsyncOpenAI clients, one per (api_key,
+    base_url), so every scanner and summarizer shares the same keep-alive
+    connection pool instead of paying connection setup on each request.
+
+    When given an `LLMCache`, completions are looked up there before any
+    request is sent and stored after a successful one. Usage and latency of
+    every completion are recorded in `metrics` (see `metrics.MetricsCollector`).
+
+    Every request first acquires capacity from the endpoint's shared
+    `RateLimiter`, which starts from `rpm`/`tpm` if given and otherwise adapts
+    to the `x-ratelimit-*` and `Retry-After` headers of the responses.
+    Transient failures are retried according to `retry_policy` (see
+    `resilience.RetryPolicy`), and each endpoint has a `CircuitBreaker` that
+    pauses submission after `failure_threshold` consecutive failures.
+
+    `complete`/`acomplete` also accept a `LoadBalancer` (see `load_balancer`)
+    in place of a base_url; every attempt, including retries, is then routed
+    to the least loaded healthy replica.
+
+    Example usage:
+        provider = ClientProvider(max_keepalive_connections=64,
+                                  cache=LLMCache('llm_cache.sqlite'))
+        scanner = PMCScanner(logger, cfg, client_provider=provider)
+        summarizer = PDFSummarizer(config, client_provider=provider)
+    """
+    def __init__(self, max_keepalive_connections: int=32, max_connections: int=64,
+                 keepalive_expiry: float=60., http2: bool=True,
+                 cache: Union[LLMCache, None]=None,
+                 metrics: Union[MetricsCollector, None]=None,
+                 rpm: Union[float, None]=None, tpm: Union[float, None]=None,
+                 retry_policy: Union[RetryPolicy, None]=None,
+                 failure_threshold: int=5, reset_timeout: float=30.,
+                 logger: Union[logging.Logger, None]=None):
+        self.limits = httpx.Limits(max_keepalive_connections=max_keepalive_connections,
+                                   max_connections=max_connections,
+                                   keepalive_expiry=keepalive_expiry)
+        self.http2 = http2 and HTTP2_AVAILABLE
+        self.cache = cache
+        self.metrics = metrics if metrics is not None else MetricsCollector()
+        self.logger = logger if logger is not None else logging.getLogger('litscan')
+        self.stats = ConnectionStats()
+        self.prompt_cache_stats: Dict[Union[str, None], PromptCacheStats] = {}
+        self.rpm = rpm
+        self.tpm = tpm
+        self.rate_limiters: Dict[Union[str, None], RateLimiter] = {}
+        self.retry_policy = retry_policy if retry_policy is not None else RetryPolicy(logger=self.logger)
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.circuit_breakers: Dict[Union[str, None], CircuitBreaker] = {}
+        self.load_balancers: Dict[Tuple, LoadBalancer] = {}
+
+        self._clients: Dict[ClientKey, OpenAI] = {}
+        self._async_clients: Dict[AsyncClientKey, AsyncOpenAI] = {}
+        self._loop: Union[asyncio.AbstractEventLoop, None] = None
+        self._loop_thread: Union[threading.Thread, None] = None
+        self._lock = threading.Lock()
+
+    def client(self, api_key: Union[str, None], base_url: Union[str, None]) -> OpenAI:
+        """Returns the shared synchronous client for this endpoint."""
+        key = (api_key, base_url)
+        limiter = self.rate_limiter(base_url)
+        with self._lock:
+            if key not in self._clients:
+                self.logger.info(f'establishing client on base_url: {base_url}')
+                http_client = DefaultHttpxClient(
+                    limits=self.limits,
+                    http2=self.http2,
+                    event_hooks={'request': [self._on_request],
+                                 'response': [self._on_response,
+                                              limiter.update_from_headers_hook]},
+                )
+                # retries are handled by `retry_policy`
+                self._clients[key] = OpenAI(api_key=api_key, base_url=base_url,
+                                            http_client=http_client, max_retries=0)
+            return self._clients[key]
+
+    def async_client(self, api_key: Union[str, None], base_url: Union[str, None]) -> AsyncOpenAI:
+        """
+        Returns the shared async client for this endpoint. Async connections
+        belong to an event loop, so each loop gets its own client; synchronous
+        callers share the provider's loop (see `run`).
+        """
+        loop = asyncio.get_running_loop()
+        key = (api_key, base_url, loop)
+        limiter = self.rate_limiter(base_url)
+        with self._lock:
+            # connections of a loop that has since closed can no longer be closed
+            for stale in [stale for stale in self._async_clients if stale[2].is_closed()]:
+                del self._async_clients[stale]
+            if key not in self._async_clients:
+                self.logger.info(f'establishing async client on base_url: {base_url}')
+                http_client = DefaultAsyncHttpxClient(
+                    limits=self.limits,
+                    http2=self.http2,
+                    event_hooks={'request': [self._aon_request],
+                                 'response': [self._aon_response,
+                                              limiter.aupdate_from_headers_hook]},
+                )
+                self._async_clients[key] = AsyncOpenAI(api_key=api_key, base_url=base_url,
+                                                       http_client=http_client, max_retries=0)
+            return self._async_clients[key]
+
+    def run(self, coro):
+        """
+        Runs a coroutine to completion on the provider's long-lived event
+        loop, started in a background thread on first use, so that
+        synchronous callers keep reusing the same async clients and their
+        connections. The coroutine runs in a copy of the caller's context
+        (e.g. metric tags).
+        """
+        loop = self._event_loop()
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        if running is loop:
+            raise RuntimeError('ClientProvider.run cannot wait on its own event loop')
+
+        future = asyncio.run_coroutine_threadsafe(coro, loop)
+        try:
+            return future.result()
+        except BaseException:
+            future.cancel()
+            raise
+
+    def _event_loop(self) -> asyncio.AbstractEventLoop:
+        with self._lock:
+            if self._loop is None:
+                self._loop = asyncio.new_event_loop()
+                self._loop_thread = threading.Thread(target=self._loop.run_forever,
+                                                     name='ClientProvider', daemon=True)
+                self._loop_thread.start()
+            return self._loop
+
+    def rate_limiter(self, base_url: Union[str, None]) -> RateLimiter:
+        """Returns the limiter shared by every request to this endpoint."""
+        with self._lock:
+            if base_url not in self.rate_limiters:
+                self.rate_limiters[base_url] = RateLimiter(self.rpm, self.tpm, logger=self.logger)
+            return self.rate_limiters[base_url]
+
+    def circuit_breaker(self, base_url: Union[str, None]) -> CircuitBreaker:
+        """Returns the circuit breaker for this endpoint."""
+        with self._lock:
+            if base_url not in self.circuit_breakers:
+                self.circuit_breakers[base_url] = CircuitBreaker(self.failure_threshold,
+                                                                 self.reset_timeout,
+                                                                 name=base_url, logger=self.logger)
+            return self.circuit_breakers[base_url]
+
+    def load_balancer(self, api_key: Union[str, None], base_urls: List[str],
+                      weights: Union[List[float], None]=None, **kwargs) -> LoadBalancer:
+        """
+        Returns the shared, health-checked `LoadBalancer` over these
+        replicas, so every scanner using them sees the same load.
+        """
+        key = (api_key, tuple(base_urls), tuple(weights) if weights else None)
+        with self._lock:
+            if key not in self.load_balancers:
+                self.logger.info(f'balancing requests over {len(base_urls)} endpoints: {base_urls}')
+                self.load_balancers[key] = LoadBalancer(base_urls, weights, api_key=api_key,
+                                                        logger=self.logger, **kwargs).start()
+            return self.load_balancers[key]
+
+    @contextmanager
+    def _route(self, base_url: Union[str, None, LoadBalancer]):
+        """Yields the base_url to send one attempt to."""
+        if isinstance(base_url, LoadBalancer):
+            with base_url.route(is_failure=self.retry_policy.is_endpoint_failure) as url:
+                yield url
+        else:
+            yield base_url
+
+    def _breaker(self, base_url: Union[str, None, LoadBalancer]) -> Union[CircuitBreaker, None]:
+        # a balancer ejects failing replicas itself
+        return None if isinstance(base_url, LoadBalancer) else self.circuit_breaker(base_url)
+
+    def complete(self, api_key: Union[str, None], base_url: Union[str, None, LoadBalancer],
+                 **request):
+        """Creates a chat completion on the shared client for this endpoint."""
+        cached = self._cached(request)
+        if cached is not None:
+            return cached
+
+        tokens = RateLimiter.estimate_tokens(request)
+
+        def attempt():
+            with self._route(base_url) as url:
+                limiter = self.rate_limiter(url)
+                limiter.acquire(tokens)
+                client = self.client(api_key, url)
+                start = time.perf_counter()
+                return url, client.chat.completions.create(**request), time.perf_counter() - start
+
+        url, response, latency = self.retry_policy.call(attempt, self._breaker(base_url),
+                                                        self.metrics)
+        self._record(url, request, response, latency)
+        self.rate_limiter(url).record_usage(tokens, getattr(response.usage, 'total_tokens', None))
+        return response
+
+    async def acomplete(self, api_key: Union[str, None], base_url: Union[str, None, LoadBalancer],
+                        **request):
+        """Async counterpart of `complete`."""
+        cached = await self._with_cache(self._cached, request)
+        if cached is not None:
+            return cached
+
+        tokens = RateLimiter.estimate_tokens(request)
+
+        async def attempt():
+            with self._route(base_url) as url:
+                limiter = self.rate_limiter(url)
+                await limiter.aacquire(tokens)
+                client = self.async_client(api_key, url)
+                start = time.perf_counter()
+                return (url, await client.chat.completions.create(**request),
+                        time.perf_counter() - start)
+
+        url, response, latency = await self.retry_policy.acall(attempt, self._breaker(base_url),
+                                                               self.metrics)
+        await self._with_cache(self._record, url, request, response, latency)
+        self.rate_limiter(url).record_usage(tokens, getattr(response.usage, 'total_tokens', None))
+        return response
+
+    def embed(self, api_key: Union[str, None], base_url: Union[str, None, LoadBalancer],
+              **request):
+        """
+        Creates embeddings on the shared client for this endpoint, paced,
+        retried and recorded in `metrics` like `complete` (but not cached).
+        """
+        texts = request.get('input')
+        texts = [texts] if isinstance(texts, str) else texts or []
+        tokens = sum(len(text) for text in texts if isinstance(text, str)) // 4 + 1
+
+        def attempt():
+            with self._route(base_url) as url:
+                limiter = self.rate_limiter(url)
+                limiter.acquire(tokens)
+                client = self.client(api_key, url)
+                start = time.perf_counter()
+                return url, client.embeddings.create(**request), time.perf_counter() - start
+
+        url, response, latency = self.retry_policy.call(attempt, self._breaker(base_url),
+                                                        self.metrics)
+        self.metrics.record(request.get('model'), response, latency)
+        self.rate_limiter(url).record_usage(tokens, getattr(response.usage, 'total_tokens', None))
+        return response
+
+    async def _with_cache(self, fn, *args):
+        """Runs `fn` on a worker thread if it touches the cache, so SQLite never blocks the loop."""
+        if self.cache is None:
+            return fn(*args)
+        return await asyncio.to_thread(fn, *args)
+
+    def _cached(self, request):
+        if self.cache is None:
+            return None
+
+        response = self.cache.get(request)
+        if response is not None:
+            self.metrics.record(request.get('model'), response, 0., cache_hit=True)
+        return response
+
+    def _record(self, base_url, request, response, latency) -> None:
+        """Accounts for a completion that was actually sent to the endpoint."""
+        self._record_usage(base_url, response)
+        self.metrics.record(request.get('model'), response, latency)
+        if self.cache is not None:
+            self.cache.put(request, response)
+
+    async def aclose(self) -> None:
+        """
+        Closes the async clients of the running event loop. Call it before
+        a loop of your own (e.g. from `asyncio.run`) ends; `close` cannot
+        reach connections of a loop that has already closed.
+        """
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            keys = [key for key in self._async_clients if key[2] is loop]
+            clients = [self._async_clients.pop(key) for key in keys]
+        for client in clients:
+            await client.close()
+
+    def close(self) -> None:
+        for balancer in list(self.load_balancers.values()):
+            balancer.stop()
+        with self._lock:
+            self.load_balancers.clear()
+            for client in self._clients.values():
+                client.close()
+            self._clients.clear()
+            async_clients = list(self._async_clients.items())
+            self._async_clients.clear()
+            loop, thread = self._loop, self._loop_thread
+            self._loop, self._loop_thread = None, None
+
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        for (_, _, client_loop), client in async_clients:
+            if client_loop.is_closed():
+                continue
+            if client_loop is running:
+                client_loop.create_task(client.close())
+            elif client_loop.is_running():
+                asyncio.run_coroutine_threadsafe(client.close(), client_loop).result()
+            else:
+                client_loop.run_until_complete(client.close())
+
+        if loop is not None:
+            loop.call_soon_threadsafe(loop.stop)
+            thread.join()
+            loop.close()
+
+    def _record_usage(self, base_url, response) -> None:
+        """Logs how much of this prompt the endpoint served from its prefix cache."""
+        with self._lock:
+            stats = self.prompt_cache_stats.setdefault(base_url, PromptCacheStats())
+
+        prompt_tokens, cached_tokens = stats.record(response)
+        self.logger.info(f'prompt tokens: {prompt_tokens} ({cached_tokens} cached, '
+                         f'{stats.hit_rate:.0%} cached on {base_url} so far)')
+
+    def _on_request(self, request):
+        request.extensions['trace'] = _ConnectionTrace()
+
+    def _on_response(self, response):
+        trace = response.request.extensions.get('trace')
+        if isinstance(trace, _ConnectionTrace):
+            self.stats.record(trace.opened)
+            self.logger.info(f'{response.request.url.path}: '
+                             f'{"new" if trace.opened else "reused"} connection '
+                             f'({self.stats.reused_connections}/{self.stats.requests} reused)')
+
+    async def _aon_request(self, request):
+        request.extensions['trace'] = _AsyncConnectionTrace()
+
+    async def _aon_response(self, response):
+        self._on_response(response)
+
+
+_default_provider = None
+
+def default_provider() -> ClientProvider:
+    """Returns the process-wide provider used when none is passed in."""
+    global _default_provider
+    if _default_provider is None:
+        _default_provider = ClientProvider()
+    return _default_provider
+
+def set_default_provider(provider: ClientProvider) -> None:
+    global _default_provider
+    _default_provider = provider
@@ -0,0 +1,159 @@
+from contextlib import contextmanager
+import httpx
+import logging
+import random
+import threading
+import time
+from typing import List, Union
+
+
+class Endpoint:
+    """One OpenAI-compatible replica and its routing state."""
+    def __init__(self, base_url: str, weight: float=1.):
+        self.base_url = base_url
+        self.weight = weight
+        self.outstanding = 0
+        self.requests = 0
+        self.failures = 0
+        self.consecutive_failures = 0
+        self.ejected_until = 0.
+
+    def available(self, now: float) -> bool:
+        return now >= self.ejected_until
+
+    def __repr__(self):
+        return (f'Endpoint({self.base_url}, weight={self.weight:g}, outstanding={self.outstanding}, '
+                f'requests={self.requests}, failures={self.failures})')
+
+
+class LoadBalancer:
+    """
+    Spreads completions over several OpenAI-compatible replicas (e.g. vLLM
+    servers) serving the same model. Each request goes to the available
+    endpoint with the fewest outstanding requests relative to its weight.
+
+    An endpoint is ejected for `eject_time` seconds after `eject_after`
+    consecutive failed requests (rate-limited ones do not count, see
+    `RetryPolicy.is_endpoint_failure`), or as soon as a periodic `/v1/models` health
+    check fails; a passing health check brings it back. If every endpoint is
+    ejected, the one due back first is used rather than failing outright.
+
+    Example usage:
+        cfg = LitScanConfig(openai_base_urls=['http://lambda13.cels.anl.gov:9999/v1',
+                                              'http://rbdgx2.cels.anl.gov:9999/v1'])
+        scanner = PMCScanner(logger, cfg)  # routes through provider.load_balancer(...)
+    """
+    def __init__(self, base_urls: List[str], weights: Union[List[float], None]=None,
+                 api_key: Union[str, None]=None, health_check_interval: float=30.,
+                 health_check_timeout: float=5., eject_after: int=3, eject_time: float=60.,
+                 logger: Union[logging.Logger, None]=None):
+        weights = weights or [1.] * len(base_urls)
+        if len(weights) != len(base_urls):
+            raise ValueError('need one weight per base_url')
+
+        self.endpoints = [Endpoint(url, weight) for url, weight in zip(base_urls, weights)]
+        self.api_key = api_key
+        self.health_check_interval = health_check_interval
+        self.health_check_timeout = health_check_timeout
+        self.eject_after = eject_after
+        self.eject_time = eject_time
+        self.logger = logger if logger is not None else logging.getLogger('litscan')
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    @property
+    def base_urls(self) -> List[str]:
+        return [endpoint.base_url for endpoint in self.endpoints]
+
+    def acquire(self) -> Endpoint:
+        """Picks an endpoint and counts a request as outstanding on it."""
+        with self._lock:
+            now = time.monotonic()
+            candidates = [e for e in self.endpoints if e.available(now)]
+            if not candidates:
+                candidates = [min(self.endpoints, key=lambda e: e.ejected_until)]
+
+            best = min((e.outstanding + 1) / e.weight for e in candidates)
+            endpoint = random.choice([e for e in candidates
+                                      if (e.outstanding + 1) / e.weight == best])
+            endpoint.outstanding += 1
+            endpoint.requests += 1
+            return endpoint
+
+    def release(self, endpoint: Endpoint, failed: bool=False) -> None:
+        with self._lock:
+            endpoint.outstanding -= 1
+            if not failed:
+                endpoint.consecutive_failures = 0
+                return
+
+            endpoint.failures += 1
+            endpoint.consecutive_failures += 1
+            if endpoint.consecutive_failures >= self.eject_after:
+                self._eject(endpoint, f'{endpoint.consecutive_failures} consecutive failures')
+
+    @contextmanager
+    def route(self, is_failure=lambda e: True):
+        """
+        Yields the base_url for one request, releasing the endpoint after.
+        `is_failure` decides which exceptions count against the endpoint.
+        """
+        endpoint = self.acquire()
+        failed = False
+        try:
+            yield endpoint.base_url
+        except Exception as e:
+            failed = is_failure(e)
+            raise
+        finally:
+            self.release(endpoint, failed=failed)
+
+    def _eject(self, endpoint: Endpoint, reason: str) -> None:
+        if endpoint.available(time.monotonic()):
+            self.logger.warn(f'ejecting {endpoint.base_url} for {self.eject_time:g}s: {reason}')
+        endpoint.ejected_until = time.monotonic() + self.eject_time
+
+    def check_health(self) -> None:
+        """Probes `/models` on every endpoint, ejecting or restoring it."""
+        headers = {'Authorization': f'Bearer {self.api_key}'} if self.api_key else {}
+        for endpoint in self.endpoints:
+            try:
+                response = httpx.get(f'{endpoint.base_url.rstrip("/")}/models', headers=headers,
+                                     timeout=self.health_check_timeout)
+                response.raise_for_status()
+                healthy, reason = True, None
+            except httpx.HTTPError as e:
+                healthy, reason = False, f'health check failed: {e}'
+
+            with self._lock:
+                if not healthy:
+                    self._eject(endpoint, reason)
+                elif not endpoint.available(time.monotonic()):
+                    self.logger.info(f'{endpoint.base_url} passed its health check, restoring')
+                    endpoint.ejected_until = 0.
+                    endpoint.consecutive_failures = 0
+
+    def start(self) -> 'LoadBalancer':
+        """Starts the background health checks (no-op if already running)."""
+        if self._thread is None and self.health_check_interval:
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._health_loop, name='llm-health-check',
+                                            daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _health_loop(self) -> None:
+        while True:
+            self.check_health()
+            if self._stop.wait(self.health_check_interval):
+                return
+
+    def __repr__(self):
+        return f'LoadBalancer({self.endpoints})'
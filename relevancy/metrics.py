@@ -0,0 +1,147 @@
+from collections import defaultdict
+from contextlib import contextmanager
+import contextvars
+import csv
+import json
+import threading
+from typing import Dict, List, Union
+
+# USD per million tokens; override or extend by passing `prices` to MetricsCollector
+DEFAULT_PRICES = {
+    'gpt-4o-mini': {'input': 0.15, 'cached_input': 0.075, 'output': 0.60},
+    'gpt-4o': {'input': 2.50, 'cached_input': 1.25, 'output': 10.00},
+}
+
+TOTAL_FIELDS = ('requests', 'prompt_tokens', 'cached_tokens', 'completion_tokens',
+                'latency', 'cost', 'cache_hits')
+
+_tags = contextvars.ContextVar('llm_metric_tags', default={})
+
+@contextmanager
+def tag(**tags):
+    """
+    Attaches tags (e.g. paper, question, term, stage) to every completion
+    recorded inside the block. Tags nest, and because they live in a context
+    variable they follow asyncio tasks and `asyncio.to_thread` calls.
+    """
+    token = _tags.set({**_tags.get(), **tags})
+    try:
+        yield
+    finally:
+        _tags.reset(token)
+
+def current_tags() -> Dict:
+    return dict(_tags.get())
+
+
+class MetricsCollector:
+    """
+    Records token usage, latency and cost for every completion made through
+    a `ClientProvider`, together with the tags active at the time, and
+    aggregates them per paper, per question and per run.
+
+    Example usage:
+        metrics = MetricsCollector(prices={'llama31-405b-fp8': {'input': 0., 'output': 0.}})
+        provider = ClientProvider(metrics=metrics)
+        with tag(term='NMNAT2'):
+            scanner.scan_pdfs(pdfs, questions)
+        metrics.write_report('llm_metrics.json')
+        metrics.write_report('llm_metrics.csv')
+    """
+    def __init__(self, prices: Union[Dict[str, Dict[str, float]], None]=None):
+        self.prices = {**DEFAULT_PRICES, **(prices or {})}
+        self.records: List[Dict] = []
+        self.counters = defaultdict(int)
+        self._lock = threading.Lock()
+
+    def record(self, model: str, response, latency: float, cache_hit: bool=False) -> Dict:
+        """Records one completion under the currently active tags."""
+        usage = getattr(response, 'usage', None)
+        details = getattr(usage, 'prompt_tokens_details', None)
+        record = {
+            **current_tags(),
+            'model': model,
+            'prompt_tokens': getattr(usage, 'prompt_tokens', None) or 0,
+            'cached_tokens': getattr(details, 'cached_tokens', None) or 0,
+            'completion_tokens': getattr(usage, 'completion_tokens', None) or 0,
+            'latency': latency,
+            'cache_hit': cache_hit,
+        }
+        # responses served from the local LLMCache cost nothing
+        record['cost'] = 0. if cache_hit else self.cost(model, record['prompt_tokens'],
+                                                        record['cached_tokens'],
+                                                        record['completion_tokens'])
+        with self._lock:
+            self.records.append(record)
+        return record
+
+    def count(self, event: str, n: int=1) -> None:
+        """Increments a run-level event counter, e.g. retries or dropped calls."""
+        with self._lock:
+            self.counters[event] += n
+
+    def cost(self, model: str, prompt_tokens: int, cached_tokens: int,
+             completion_tokens: int) -> float:
+        price = self._price(model)
+        if price is None:
+            return 0.
+
+        cached_price = price.get('cached_input', price['input'])
+        return ((prompt_tokens - cached_tokens) * price['input']
+                + cached_tokens * cached_price
+                + completion_tokens * price['output']) / 1e6
+
+    def _price(self, model: str) -> Union[Dict[str, float], None]:
+        """Exact price table match, else the longest matching prefix (dated snapshots)."""
+        if model in self.prices:
+            return self.prices[model]
+        matches = [name for name in self.prices if model.startswith(name)]
+        return self.prices[max(matches, key=len)] if matches else None
+
+    def totals(self, by: Union[str, None]=None) -> Dict:
+        """
+        Sums requests, tokens, latency and cost over all records, or per
+        value of the tag `by` (e.g. 'paper', 'question', 'term').
+        """
+        groups = defaultdict(lambda: dict.fromkeys(TOTAL_FIELDS, 0))
+        with self._lock:
+            records = list(self.records)
+
+        for record in records:
+            group = groups[record.get(by) if by is not None else 'run']
+            group['requests'] += 1
+            group['cache_hits'] += record['cache_hit']
+            for field in ('prompt_tokens', 'cached_tokens', 'completion_tokens', 'latency', 'cost'):
+                group[field] += record[field]
+
+        if by is None:
+            return groups['run']
+        return dict(groups)
+
+    def summary(self) -> Dict:
+        return {
+            'run': {**self.totals(), **self.counters},
+            'per_term': self.totals('term'),
+            'per_paper': self.totals('paper'),
+            'per_question': self.totals('question'),
+            'per_stage': self.totals('stage'),
+        }
+
+    def write_report(self, path: str) -> str:
+        """
+        Writes the aggregated summary as JSON, or one row per completion as
+        CSV, depending on the file extension.
+        """
+        if path.endswith('.csv'):
+            with self._lock:
+                records = list(self.records)
+            fields = sorted({key for record in records for key in record})
+            with open(path, 'w', newline='') as f:
+                writer = csv.DictWriter(f, fieldnames=fields)
+                writer.writeheader()
+                writer.writerows(records)
+        else:
+            with open(path, 'w') as f:
+                json.dump(self.summary(), f, indent=2, default=str)
+
+        return path
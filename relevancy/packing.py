@@ -0,0 +1,109 @@
+import csv
+import json
+import sys
+from typing import Callable, Dict, Iterable, List, Optional, Union
+
+def read_registry(path: str, id_column: str='doi',
+                  text_columns: Iterable[str]=('title', 'abstract'),
+                  delimiter: str='|') -> Dict[str, str]:
+    """
+    Reads a crawler registry CSV (e.g. `biorxiv_crawl_2.csv`, which is
+    pipe-delimited) into {id: text}, joining `text_columns` as
+    "Title: ...\\nAbstract: ...". Rows without any text are skipped, and a
+    repeated id keeps its latest row (registries list every version).
+    """
+    csv.field_size_limit(sys.maxsize)
+    documents = {}
+    with open(path, newline='') as f:
+        for row in csv.DictReader(f, delimiter=delimiter):
+            parts = [f'{column.capitalize()}: {row[column].strip()}'
+                     for column in text_columns if (row.get(column) or '').strip()]
+            if row.get(id_column) and parts:
+                documents[row[id_column]] = '\n'.join(parts)
+    return documents
+
+
+class DocumentPacker:
+    """
+    Fills one prompt with several short documents (abstracts, short
+    communications, registry rows), each wrapped in a
+    `<document id="...">` tag, so a set of questions is asked once per pack
+    instead of once per document. Answers come back as JSON verdicts keyed
+    by document id and question number and are split back per document.
+
+    Example usage:
+        packer = DocumentPacker(max_tokens=12000)
+        for pack in packer.pack(read_registry('biorxiv_crawl_2.csv')):
+            prompt = PACKED_RELEVANCE.format(DOCUMENTS=packer.format(pack), QUESTIONS=...)
+            answers = packer.parse(response_text, list(pack), len(questions))
+    """
+    def __init__(self, max_tokens: int=12000, max_documents: int=32,
+                 count_tokens: Union[Callable[[str], int], None]=None):
+        self.max_tokens = max_tokens
+        self.max_documents = max_documents
+        if count_tokens is None:
+            from chunking import count_tokens
+        self.count_tokens = count_tokens
+
+    def pack(self, documents: Dict[str, str]) -> List[Dict[str, str]]:
+        """
+        Groups documents, in order, into packs of at most `max_tokens` and
+        `max_documents`. A document larger than `max_tokens` gets a pack to
+        itself.
+        """
+        packs, pack, size = [], {}, 0
+        for doc_id, text in documents.items():
+            tokens = self.count_tokens(text)
+            if pack and (size + tokens > self.max_tokens or len(pack) >= self.max_documents):
+                packs.append(pack)
+                pack, size = {}, 0
+            pack[doc_id] = text
+            size += tokens
+
+        if pack:
+            packs.append(pack)
+        return packs
+
+    @staticmethod
+    def format(documents: Dict[str, str]) -> str:
+        return '\n\n'.join(f'<document id="{doc_id}">\n{text}\n</document>'
+                           for doc_id, text in documents.items())
+
+    @staticmethod
+    def parse(text: Optional[str], doc_ids: List[str],
+              n_questions: int) -> Dict[str, Optional[List[str]]]:
+        """
+        Splits a packed response into one answer per question for each
+        document, worded like the per-question answers ("Yes. <explanation>").
+        Documents the response does not fully and unambiguously cover map to
+        None, so they can be asked again on their own.
+        """
+        answers = {doc_id: [None] * n_questions for doc_id in doc_ids}
+        invalid = set()
+
+        text = (text or '').strip()
+        # tolerate the array being wrapped in a markdown code fence
+        if text.startswith('```'):
+            text = text.strip('`').split('\n', 1)[-1]
+        try:
+            verdicts = json.loads(text)
+        except json.JSONDecodeError:
+            verdicts = []
+
+        for verdict in verdicts if isinstance(verdicts, list) else []:
+            if not isinstance(verdict, dict) or str(verdict.get('doc_id')) not in answers:
+                continue
+
+            doc_id = str(verdict['doc_id'])
+            j = verdict.get('question_index')
+            if (not isinstance(j, int) or isinstance(j, bool) or not 0 < j <= n_questions
+                    or not isinstance(verdict.get('relevant'), bool)
+                    or answers[doc_id][j - 1] is not None):
+                invalid.add(doc_id)
+                continue
+
+            explanation = verdict.get('explanation') or ''
+            answers[doc_id][j - 1] = f"{'Yes' if verdict['relevant'] else 'No'}. {explanation}"
+
+        return {doc_id: None if doc_id in invalid or None in doc_answers else doc_answers
+                for doc_id, doc_answers in answers.items()}
@@ -0,0 +1,136 @@
+import math
+import re
+from collections import Counter
+from typing import Callable, Dict, List, Union
+
+TOKEN_PATTERN = re.compile(r'[a-z0-9]+(?:[-_][a-z0-9]+)*')
+
+STOPWORDS = frozenset('''
+a about above after again against all also am an and any are as at be because been
+before being below between both but by can could did do does doing down during each
+few for from further had has have having here how i if in into is it its itself just
+may me might more most must my no nor not now of off on once only or other our out
+over own paper passage please same should so some such study than that the their them
+then there these they this those through to too under until up very was we were what
+when where which while who whom why will with would you your discuss discusses
+discussed describe describes related regarding relevant role one two
+'''.split())
+
+class BM25Prefilter:
+    """
+    Cheap lexical stage that drops chunks with little overlap with the
+    questions before any of them reach the LLM. Chunks of a paper are scored
+    with Okapi BM25 against the content words of the questions plus any gene
+    synonyms, using the paper's own chunks as the corpus. Pure Python, so it
+    runs anywhere.
+
+    Chunks scoring at or below `threshold` are dropped; with `top_k` only the
+    best `top_k` chunks are kept. Kept chunks stay in document order.
+
+    Example usage:
+        synonyms = ['NMNAT2', 'nicotinamide mononucleotide adenylyltransferase 2']
+        prefilter = BM25Prefilter(synonyms=synonyms, top_k=2)
+        scanner = PMCScanner(logger, cfg, prefilter=prefilter)
+    """
+    def __init__(self, synonyms: Union[List[str], None]=None,
+                 threshold: float=0., top_k: Union[int, None]=None,
+                 k1: float=1.5, b: float=0.75, synonym_weight: float=2.):
+        self.synonyms = synonyms or []
+        self.threshold = threshold
+        self.top_k = top_k
+        self.k1 = k1
+        self.b = b
+        self.synonym_weight = synonym_weight
+
+    @staticmethod
+    def tokenize(text: str) -> List[str]:
+        return TOKEN_PATTERN.findall(text.lower())
+
+    def query_terms(self, questions: List[str]) -> Dict[str, float]:
+        """Weighted query terms: question content words plus synonym words."""
+        terms = {}
+        for question in questions:
+            for term in self.tokenize(question):
+                if term not in STOPWORDS and len(term) > 1:
+                    terms[term] = 1.
+
+        for synonym in self.synonyms:
+            for term in self.tokenize(synonym):
+                if term not in STOPWORDS:
+                    terms[term] = self.synonym_weight
+
+        return terms
+
+    def score(self, chunks: List[str], questions: List[str]) -> List[float]:
+        """BM25 score of each chunk against the questions."""
+        terms = self.query_terms(questions)
+        docs = [Counter(self.tokenize(chunk)) for chunk in chunks]
+        lengths = [sum(doc.values()) for doc in docs]
+        avg_length = sum(lengths) / len(lengths) if lengths else 0.
+        n_docs = len(docs)
+
+        idf = {}
+        for term in terms:
+            df = sum(1 for doc in docs if term in doc)
+            idf[term] = math.log(1 + (n_docs - df + .5) / (df + .5))
+
+        scores = []
+        for doc, length in zip(docs, lengths):
+            norm = self.k1 * (1 - self.b + self.b * length / avg_length) if avg_length else self.k1
+            score = 0.
+            for term, weight in terms.items():
+                tf = doc.get(term, 0)
+                if tf:
+                    score += weight * idf[term] * tf * (self.k1 + 1) / (tf + norm)
+            scores.append(score)
+
+        return scores
+
+    def keep(self, chunks: List[str], questions: List[str]) -> List[int]:
+        """Indices of the chunks that pass the filter, in document order."""
+        scores = self.score(chunks, questions)
+        kept = [i for i, score in enumerate(scores) if score > self.threshold]
+        if self.top_k is not None:
+            kept = sorted(sorted(kept, key=lambda i: -scores[i])[:self.top_k])
+        return kept
+
+    def filter(self, chunks: List[str], questions: List[str]) -> List[str]:
+        return [chunks[i] for i in self.keep(chunks, questions)]
+
+    def evaluate(self, papers: List[Dict], questions: List[str],
+                 count_tokens: Union[Callable[[str], int], None]=None) -> Dict:
+        """
+        Measures token savings and recall against a labelled set.
+
+        Args:
+            papers (list): One dict per paper with 'chunks' (list of str) and
+                           'labels' (list of bool, True if the chunk is relevant)
+            questions (list): The questions the chunks were labelled against
+            count_tokens (callable, optional): Token counter, defaults to the
+                                               gpt-4o tokenizer
+
+        Returns:
+            dict: Chunk and token totals before/after filtering, the fraction
+                  of tokens saved and the recall of relevant chunks
+        """
+        if count_tokens is None:
+            from chunking import count_tokens
+
+        report = Counter()
+        for paper in papers:
+            chunks, labels = paper['chunks'], paper['labels']
+            kept = set(self.keep(chunks, questions))
+            for i, (chunk, label) in enumerate(zip(chunks, labels)):
+                tokens = count_tokens(chunk)
+                report['chunks'] += 1
+                report['tokens'] += tokens
+                report['relevant'] += bool(label)
+                if i in kept:
+                    report['chunks_kept'] += 1
+                    report['tokens_kept'] += tokens
+                    report['relevant_kept'] += bool(label)
+
+        report = dict(report)
+        report['token_savings'] = 1 - report.get('tokens_kept', 0) / report['tokens'] if report.get('tokens') else 0.
+        report['recall'] = report.get('relevant_kept', 0) / report['relevant'] if report.get('relevant') else 1.
+        return report
@@ -147,6 +147,68 @@ Final Task:
 "Please produce one cohesive summary that reflects all the important information from these summaries, while preserving every inline citation as originally provided. Ensure the final narrative flows naturally and retains all the critical details along with their associated inline citations."
 '''
 
+# The relevance prompts are split so that the system message and the paper
+# content form a byte-identical prefix for every question asked of a chunk,
+# which lets OpenAI and vLLM prefix caching reuse it. Anything that varies
+# per question must stay in the final message.
+RELEVANCE_SYSTEM = '''
+You will be given content from a scientific paper, followed by one or more
+questions about it. Decide whether the content is relevant to answering each
+question.
+'''.strip()
+
+RELEVANCE_CONTENT = '''
+Content: {CONTENT}
+'''.strip()
+
+RELEVANCE_QUESTION = '''
+Is this passage relevant to answering the question: "{QUESTION}"? Please
+respond with "Yes" or "No" followed by a brief explanation.
+'''.strip()
+
+MULTI_QUESTION_RELEVANCE = '''
+Questions:
+{QUESTIONS}
+
+For each of the numbered questions above, decide whether the passage is
+relevant to answering it. Respond with only a JSON array containing one object
+per question, in the form
+[{{"question_index": 1, "relevant": true, "explanation": "..."}}, ...], where
+"question_index" is the number of the question, "relevant" is true or false and
+"explanation" is a brief explanation of your verdict.
+'''.strip()
+
+TRIAGE_PROMPT = '''
+Below are the titles and abstracts of several scientific papers, each inside a
+<document> tag with its id, followed by numbered questions. For each paper,
+decide which of the questions its full text is likely to help answer.
+
+{DOCUMENTS}
+
+Questions:
+{QUESTIONS}
+
+Respond with only a JSON array containing one object per paper, in the form
+[{{"doc_id": "<id>", "questions": [1, 3]}}, ...], where "questions" lists the
+numbers of the questions the paper is likely relevant to, or is empty.
+'''.strip()
+
+PACKED_RELEVANCE = '''
+Below are several short scientific documents, each inside a <document> tag with
+its id, followed by numbered questions.
+
+{DOCUMENTS}
+
+Questions:
+{QUESTIONS}
+
+For every document and every numbered question, decide whether the document
+is relevant to answering the question. Respond with only a JSON array
+containing one object per (document, question) pair, in the form
+[{{"doc_id": "<id>", "question_index": 1, "relevant": true, "explanation": "..."}}, ...],
+where "explanation" is a brief explanation of your verdict.
+'''.strip()
+
 PROMPTS = {
     'condense': CONDENSE_PROMPT,
     'mechanistic_model': MECHANISTIC_MODEL_PROMPT,
@@ -154,5 +216,11 @@ PROMPTS = {
     'chunk_merge': CHUNK_MERGE,
     'chunk_merge_2': CHUNK_MERGE_2,
     'diagram': DIAGRAM,
+    'relevance_system': RELEVANCE_SYSTEM,
+    'relevance_content': RELEVANCE_CONTENT,
+    'relevance_question': RELEVANCE_QUESTION,
+    'multi_question_relevance': MULTI_QUESTION_RELEVANCE,
+    'triage': TRIAGE_PROMPT,
+    'packed_relevance': PACKED_RELEVANCE,
     
 }
@@ -0,0 +1,162 @@
+import asyncio
+from email.utils import parsedate_to_datetime
+import logging
+import re
+import threading
+import time
+from typing import Mapping, Union
+
+DURATION = re.compile(r'(\d+(?:\.\d+)?)(ms|s|m|h)')
+UNIT_SECONDS = {'ms': 1e-3, 's': 1., 'm': 60., 'h': 3600.}
+
+# completion tokens assumed for requests that do not set max_tokens
+DEFAULT_COMPLETION_TOKENS = 256
+
+def parse_duration(value: str) -> float:
+    """Parses reset durations such as '1s', '6m0s' or '20ms' into seconds."""
+    try:
+        return float(value)
+    except ValueError:
+        return sum(float(n) * UNIT_SECONDS[unit] for n, unit in DURATION.findall(value))
+
+def parse_retry_after(headers: Mapping[str, str]) -> Union[float, None]:
+    """Seconds to wait according to `retry-after-ms` or `Retry-After`, if present."""
+    if headers.get('retry-after-ms'):
+        try:
+            return float(headers['retry-after-ms']) / 1000
+        except ValueError:
+            pass
+
+    value = headers.get('retry-after')
+    if not value:
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        try:
+            return max(parsedate_to_datetime(value).timestamp() - time.time(), 0.)
+        except (TypeError, ValueError):
+            return None
+
+
+class TokenBucket:
+    """Bucket holding up to `capacity` units, refilled evenly over a minute."""
+    def __init__(self, capacity: float):
+        self.capacity = capacity
+        self.level = capacity
+        self.updated = time.monotonic()
+
+    def refill(self, now: float) -> None:
+        self.level = min(self.capacity, self.level + (now - self.updated) * self.capacity / 60.)
+        self.updated = now
+
+    def wait_time(self, amount: float) -> float:
+        """Seconds until `amount` units are available (requests larger than the bucket wait for a full one)."""
+        missing = min(amount, self.capacity) - self.level
+        return max(missing, 0.) * 60. / self.capacity
+
+
+class RateLimiter:
+    """
+    Shared requests-per-minute and tokens-per-minute limiter for one
+    endpoint. Every completion acquires one request and its estimated tokens
+    before it is sent, so throughput sits at the provider limit rather than
+    at a fixed pace.
+
+    Limits can be given up front, and are otherwise learned from the
+    `x-ratelimit-*` headers OpenAI (and compatible servers) return: the limit
+    headers size the buckets and the remaining/reset headers pull the local
+    view back in line with the server's. A `Retry-After` header pauses all
+    submission until it has passed. With no limits given or advertised,
+    requests are not throttled.
+    """
+    def __init__(self, rpm: Union[float, None]=None, tpm: Union[float, None]=None,
+                 logger: Union[logging.Logger, None]=None):
+        self.requests = TokenBucket(rpm) if rpm else None
+        self.tokens = TokenBucket(tpm) if tpm else None
+        self.paused_until = 0.
+        self.logger = logger if logger is not None else logging.getLogger('litscan')
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def estimate_tokens(request: dict) -> int:
+        """Rough token cost of a chat.completions request (~4 characters per token)."""
+        characters = sum(len(message.get('content') or '') for message in request.get('messages', [])
+                         if isinstance(message.get('content'), str))
+        completion = (request.get('max_tokens') or request.get('max_completion_tokens')
+                      or DEFAULT_COMPLETION_TOKENS)
+        return characters // 4 + completion
+
+    def _reserve(self, tokens: int) -> float:
+        """Takes capacity for one request if available, else returns how long to wait."""
+        with self._lock:
+            now = time.monotonic()
+            wait = self.paused_until - now
+            for bucket, amount in ((self.requests, 1), (self.tokens, tokens)):
+                if bucket is not None:
+                    bucket.refill(now)
+                    wait = max(wait, bucket.wait_time(amount))
+
+            if wait > 0:
+                return wait
+
+            if self.requests is not None:
+                self.requests.level -= 1
+            if self.tokens is not None:
+                self.tokens.level -= min(tokens, self.tokens.capacity)
+            return 0.
+
+    def acquire(self, tokens: int) -> None:
+        while (wait := self._reserve(tokens)) > 0:
+            time.sleep(wait)
+
+    async def aacquire(self, tokens: int) -> None:
+        while (wait := self._reserve(tokens)) > 0:
+            await asyncio.sleep(wait)
+
+    def record_usage(self, estimated: int, actual: Union[int, None]) -> None:
+        """Corrects the token bucket once the real usage of a request is known."""
+        if actual is None or self.tokens is None:
+            return
+        with self._lock:
+            self.tokens.level = min(self.tokens.capacity, self.tokens.level + estimated - actual)
+
+    def update_from_headers(self, headers: Mapping[str, str]) -> None:
+        """Adapts the limits and current levels to the server's rate-limit headers."""
+        with self._lock:
+            now = time.monotonic()
+            for kind in ('requests', 'tokens'):
+                limit = headers.get(f'x-ratelimit-limit-{kind}')
+                remaining = headers.get(f'x-ratelimit-remaining-{kind}')
+                if not limit:
+                    continue
+
+                try:
+                    limit = float(limit)
+                except ValueError:
+                    continue
+
+                bucket = getattr(self, kind)
+                if bucket is None or bucket.capacity != limit:
+                    self.logger.info(f'rate limit: {limit:g} {kind} per minute')
+                    bucket = TokenBucket(limit)
+                    setattr(self, kind, bucket)
+
+                bucket.refill(now)
+                if remaining:
+                    try:
+                        bucket.level = min(bucket.level, float(remaining))
+                    except ValueError:
+                        pass
+
+            retry_after = parse_retry_after(headers)
+            if retry_after:
+                self.logger.info(f'rate limit: pausing submission for {retry_after:.1f}s')
+                self.paused_until = max(self.paused_until, now + retry_after)
+
+    def update_from_headers_hook(self, response) -> None:
+        """httpx response hook, so retried 429s are seen as well as successes."""
+        self.update_from_headers(response.headers)
+
+    async def aupdate_from_headers_hook(self, response) -> None:
+        self.update_from_headers(response.headers)
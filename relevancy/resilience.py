@@ -0,0 +1,210 @@
+import asyncio
+import logging
+import openai
+import random
+from rate_limit import parse_retry_after
+import threading
+import time
+from typing import Callable, Union
+
+# status codes worth retrying besides 429 and 5xx
+RETRYABLE_STATUS = (408, 409)
+
+
+class CircuitOpenError(Exception):
+    """Raised when an endpoint's circuit stays open past a call's retry budget."""
+
+
+class CircuitBreaker:
+    """
+    Stops submission to an endpoint that keeps failing. After
+    `failure_threshold` consecutive failures the circuit opens and callers
+    wait instead of sending; after `reset_timeout` seconds a single probe is
+    let through, which closes the circuit on success or reopens it on failure.
+    """
+    def __init__(self, failure_threshold: int=5, reset_timeout: float=30.,
+                 name: Union[str, None]=None, logger: Union[logging.Logger, None]=None):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.name = name
+        self.logger = logger if logger is not None else logging.getLogger('litscan')
+        self.failures = 0
+        self.opened_at = None
+        self.probing = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return 'closed'
+        return 'half_open' if self.probing else 'open'
+
+    def reserve(self) -> float:
+        """Returns 0 if a request may be sent now, else how long to wait first."""
+        with self._lock:
+            if self.opened_at is None:
+                return 0.
+
+            remaining = self.opened_at + self.reset_timeout - time.monotonic()
+            if remaining > 0:
+                return remaining
+            if not self.probing:
+                self.probing = True
+                return 0.
+            # a probe is in flight, check back shortly
+            return min(1., self.reset_timeout)
+
+    def record_success(self) -> None:
+        with self._lock:
+            if self.opened_at is not None:
+                self.logger.info(f'circuit closed for {self.name}')
+            self.failures = 0
+            self.opened_at = None
+            self.probing = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self.failures += 1
+            if self.probing or (self.opened_at is None and self.failures >= self.failure_threshold):
+                self.logger.warn(f'circuit opened for {self.name} after {self.failures} '
+                                 f'consecutive failures, pausing {self.reset_timeout:g}s')
+                self.opened_at = time.monotonic()
+                self.probing = False
+
+
+class RetryPolicy:
+    """
+    Retries transient completion failures (429, 408/409, 5xx, timeouts and
+    connection errors) with full-jitter exponential backoff. A `Retry-After`
+    header on the error takes precedence over the computed delay.
+
+    Each call gives up after `max_attempts` attempts or once `max_elapsed`
+    seconds have been spent on it, and `budget` optionally caps the number
+    of retries over the whole run so a failing endpoint cannot double the
+    load on itself. Retries and calls given up on are counted in the
+    provider's metrics as 'retries' and 'dropped_calls'.
+    """
+    def __init__(self, max_attempts: int=6, base_delay: float=1., max_delay: float=30.,
+                 max_elapsed: float=180., budget: Union[int, None]=None,
+                 logger: Union[logging.Logger, None]=None):
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.max_elapsed = max_elapsed
+        self.budget = budget
+        self.logger = logger if logger is not None else logging.getLogger('litscan')
+        self.retries = 0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def is_retryable(error: Exception) -> bool:
+        if isinstance(error, openai.APIConnectionError):
+            # includes APITimeoutError
+            return True
+        if isinstance(error, openai.APIStatusError):
+            return (error.status_code == 429 or error.status_code >= 500
+                    or error.status_code in RETRYABLE_STATUS)
+        return False
+
+    @staticmethod
+    def is_endpoint_failure(error: Exception) -> bool:
+        """
+        Whether an error says the endpoint itself is unhealthy. Throttling
+        (429, or any response asking to `Retry-After`) is left to the rate
+        limiter rather than held against the endpoint.
+        """
+        if not RetryPolicy.is_retryable(error):
+            return False
+        response = getattr(error, 'response', None)
+        if getattr(error, 'status_code', None) == 429 or (
+                response is not None and parse_retry_after(response.headers) is not None):
+            return False
+        return True
+
+    def delay(self, attempt: int, error: Exception) -> float:
+        response = getattr(error, 'response', None)
+        if response is not None:
+            retry_after = parse_retry_after(response.headers)
+            if retry_after is not None:
+                return retry_after
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+
+    def _take_retry(self) -> bool:
+        with self._lock:
+            if self.budget is not None and self.retries >= self.budget:
+                return False
+            self.retries += 1
+            return True
+
+    def _next_delay(self, attempt: int, error: Exception, start: float, metrics) -> float:
+        """Delay before the next attempt, or re-raises `error` if the call is out of budget."""
+        delay = self.delay(attempt, error)
+        elapsed = time.monotonic() - start
+        if (not self.is_retryable(error) or attempt + 1 >= self.max_attempts
+                or elapsed + delay > self.max_elapsed or not self._take_retry()):
+            if metrics is not None:
+                metrics.count('dropped_calls')
+            raise error
+
+        if metrics is not None:
+            metrics.count('retries')
+        self.logger.info(f'retrying in {delay:.1f}s (attempt {attempt + 2}/{self.max_attempts}): '
+                         f'{type(error).__name__}: {error}')
+        return delay
+
+    def _breaker_wait(self, breaker: Union[CircuitBreaker, None], start: float, metrics) -> float:
+        if breaker is None:
+            return 0.
+        wait = breaker.reserve()
+        if wait > 0 and time.monotonic() - start + wait > self.max_elapsed:
+            if metrics is not None:
+                metrics.count('dropped_calls')
+            raise CircuitOpenError(f'circuit open for {breaker.name}')
+        return wait
+
+    @staticmethod
+    def _record(breaker: Union[CircuitBreaker, None], error: Exception) -> None:
+        # a non-retryable error (e.g. 400) still means the endpoint is up
+        if breaker is not None:
+            if RetryPolicy.is_retryable(error):
+                breaker.record_failure()
+            else:
+                breaker.record_success()
+
+    def call(self, fn: Callable, breaker: Union[CircuitBreaker, None]=None, metrics=None):
+        """Calls `fn()` until it succeeds or the retry budget is exhausted."""
+        start = time.monotonic()
+        attempt = 0
+        while True:
+            while (wait := self._breaker_wait(breaker, start, metrics)) > 0:
+                time.sleep(wait)
+            try:
+                result = fn()
+            except Exception as e:
+                self._record(breaker, e)
+                time.sleep(self._next_delay(attempt, e, start, metrics))
+                attempt += 1
+                continue
+
+            if breaker is not None:
+                breaker.record_success()
+            return result
+
+    async def acall(self, fn: Callable, breaker: Union[CircuitBreaker, None]=None, metrics=None):
+        """Async counterpart of `call`, `fn` returning an awaitable."""
+        start = time.monotonic()
+        attempt = 0
+        while True:
+            while (wait := self._breaker_wait(breaker, start, metrics)) > 0:
+                await asyncio.sleep(wait)
+            try:
+                result = await fn()
+            except Exception as e:
+                self._record(breaker, e)
+                await asyncio.sleep(self._next_delay(attempt, e, start, metrics))
+                attempt += 1
+                continue
+
+            if breaker is not None:
+                breaker.record_success()
+            return result
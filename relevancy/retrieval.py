@@ -0,0 +1,132 @@
+from chunking import chunk_text
+import hashlib
+import json
+from llm_client import ClientProvider, default_provider
+import numpy as np
+import os
+import threading
+from typing import Dict, List, Tuple, Union
+
+class EmbeddingRetriever:
+    """
+    Splits a paper into small passages, embeds them once and returns the
+    top-k passages for each question by cosine similarity, so relevance
+    checking needs one LLM call per question instead of one per (chunk,
+    question) pair.
+
+    Embeddings come from an OpenAI-compatible embeddings endpoint, or from a
+    local sentence-transformers model on CPU if `local_model` is set. Each
+    paper's passages and normalised embedding matrix are stored in
+    `cache_dir`, keyed on a hash of the text and the embedding settings, so
+    asking new questions of the same corpus needs no re-embedding. Question
+    embeddings are kept in memory and reused for every paper. Endpoint calls
+    go through the client provider's rate limiter, retries and metrics.
+
+    Example usage:
+        retriever = EmbeddingRetriever(api_key=cfg.openai_api_key,
+                                       base_url=cfg.openai_base_url, top_k=4)
+        scanner = PMCScanner(logger, cfg, retriever=retriever)
+    """
+    def __init__(self, model: str='text-embedding-3-small',
+                 api_key: Union[str, None]=None, base_url: Union[str, None]=None,
+                 local_model: Union[str, None]=None,
+                 passage_tokens: int=512, passage_overlap: int=64, top_k: int=4,
+                 cache_dir: str='embeddings', batch_size: int=128,
+                 client_provider: Union[ClientProvider, None]=None):
+        self.model = local_model if local_model is not None else model
+        self.api_key = api_key
+        self.base_url = base_url
+        self.local_model = local_model
+        self.passage_tokens = passage_tokens
+        self.passage_overlap = passage_overlap
+        self.top_k = top_k
+        self.cache_dir = cache_dir
+        self.batch_size = batch_size
+        self.client_provider = client_provider if client_provider is not None else default_provider()
+        self._encoder = None
+        self._question_vectors: Dict[Tuple[str, ...], np.ndarray] = {}
+        self._lock = threading.Lock()
+
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def passages(self, text: str) -> List[str]:
+        """Split text into small overlapping passages based on token count."""
+        return chunk_text(text, chunk_size=self.passage_tokens, overlap=self.passage_overlap)
+
+    def embed(self, texts: List[str]) -> np.ndarray:
+        """Embeds texts into a matrix of unit-length rows."""
+        if self.local_model is not None:
+            if self._encoder is None:
+                from sentence_transformers import SentenceTransformer
+                self._encoder = SentenceTransformer(self.local_model, device='cpu')
+            vectors = self._encoder.encode(texts, batch_size=self.batch_size)
+        else:
+            vectors = []
+            for start in range(0, len(texts), self.batch_size):
+                response = self.client_provider.embed(self.api_key, self.base_url, model=self.model,
+                                                      input=texts[start:start + self.batch_size])
+                vectors.extend(item.embedding for item in sorted(response.data, key=lambda d: d.index))
+
+        matrix = np.asarray(vectors, dtype=np.float32)
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        return matrix / np.where(norms == 0, 1, norms)
+
+    def index(self, text: str) -> Tuple[List[str], np.ndarray]:
+        """
+        Returns the passages of a paper and their embeddings, loading them
+        from `cache_dir` when this text was embedded before.
+        """
+        settings = f'{self.model}|{self.passage_tokens}|{self.passage_overlap}'
+        key = hashlib.sha256(f'{settings}\n{text}'.encode('utf8')).hexdigest()[:32]
+        matrix_path = os.path.join(self.cache_dir, f'{key}.npy')
+        passages_path = os.path.join(self.cache_dir, f'{key}.json')
+
+        if os.path.exists(matrix_path) and os.path.exists(passages_path):
+            with open(passages_path) as f:
+                return json.load(f), np.load(matrix_path)
+
+        passages = self.passages(text)
+        matrix = self.embed(passages)
+        # written to temporary files and renamed into place, matrix last, so an
+        # interrupted or concurrent run never leaves a partial pair under this key
+        self._write(passages_path, lambda f: f.write(json.dumps(passages).encode('utf8')))
+        self._write(matrix_path, lambda f: np.save(f, matrix))
+        return passages, matrix
+
+    @staticmethod
+    def _write(path: str, write) -> None:
+        tmp_path = f'{path}.{os.getpid()}.{threading.get_ident()}.tmp'
+        try:
+            with open(tmp_path, 'wb') as f:
+                write(f)
+            os.replace(tmp_path, path)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+    def question_vectors(self, questions: List[str]) -> np.ndarray:
+        """Embeddings of a question set, computed once and shared by every paper."""
+        key = tuple(questions)
+        with self._lock:
+            vectors = self._question_vectors.get(key)
+        if vectors is None:
+            vectors = self.embed(questions)
+            with self._lock:
+                vectors = self._question_vectors.setdefault(key, vectors)
+        return vectors
+
+    def retrieve(self, text: str, questions: List[str]) -> List[List[str]]:
+        """
+        Returns, for each question, the `top_k` most similar passages in
+        document order.
+        """
+        passages, matrix = self.index(text)
+        similarities = self.question_vectors(questions) @ matrix.T
+
+        k = min(self.top_k, len(passages))
+        retrieved = []
+        for row in similarities:
+            best = np.argpartition(-row, k - 1)[:k]
+            retrieved.append([passages[i] for i in sorted(best)])
+
+        return retrieved
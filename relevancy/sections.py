@@ -0,0 +1,179 @@
+from chunking import chunk_text, count_tokens
+from collections import Counter
+import re
+from typing import Dict, Iterable, List, Tuple, Union
+
+# canonical section name -> headings that open it, compared lowercased
+SECTION_HEADINGS = {
+    'abstract': ('abstract', 'summary', 'significance', 'significance statement'),
+    'introduction': ('introduction', 'background'),
+    'methods': ('methods', 'materials and methods', 'material and methods',
+                'methods and materials', 'experimental procedures', 'experimental section',
+                'methodology', 'star methods', 'online methods'),
+    'results': ('results', 'results and discussion', 'findings'),
+    'discussion': ('discussion',),
+    'conclusion': ('conclusion', 'conclusions', 'concluding remarks'),
+    'supplementary': ('supplementary material', 'supplementary materials',
+                      'supplementary information', 'supplementary data',
+                      'supporting information'),
+    'acknowledgements': ('acknowledgements', 'acknowledgments', 'acknowledgement',
+                         'acknowledgment', 'funding', 'funding information'),
+    'declarations': ('author contributions', 'competing interests', 'conflict of interest',
+                     'conflicts of interest', 'declaration of interests',
+                     'declaration of competing interest', 'data availability',
+                     'data availability statement', 'ethics statement', 'abbreviations'),
+    'references': ('references', 'bibliography', 'literature cited', 'references and notes',
+                   'works cited'),
+}
+HEADING_SECTIONS = {heading: section for section, headings in SECTION_HEADINGS.items()
+                    for heading in headings}
+
+# 'front' is everything before the first recognised heading (title, authors, ...)
+DEFAULT_SECTIONS = ('front', 'abstract', 'introduction', 'methods', 'results',
+                    'discussion', 'conclusion', 'supplementary')
+
+# a whole line, optionally numbered, capitalised so that a paragraph ending on
+# a lone "results." is not mistaken for a heading
+HEADING_PATTERN = re.compile(r'^(?:(?:\d+(?:\.\d+)*|[IVX]+)\.?\s+)?([A-Z][A-Za-z ]{2,60}?)\s*:?$')
+PAGE_NUMBER_PATTERN = re.compile(r'^(?:page\s*)?\d+(?:\s*(?:of|/)\s*\d+)?$', re.IGNORECASE)
+FRONT_BOILERPLATE_PATTERN = re.compile(
+    r'\b(?:universit\w*|institut\w*|department|dept\.|hospital|laborator\w+|school of|'
+    r'college|faculty|centre|center for|received|accepted|published|correspondence|'
+    r'copyright|licen[cs]e|doi)\b|@|©|https?://', re.IGNORECASE)
+
+
+class SectionChunker:
+    """
+    Structure-aware replacement for fixed token windows over raw page text.
+    Lines repeated at the top or bottom of many pages (running headers,
+    footers, page numbers) are stripped, the text is split on section
+    headings such as Abstract, Methods or References, and only `sections`
+    are kept. When a heading follows the front matter, affiliation, license
+    and correspondence lines among its first `front_lines` lines are
+    dropped as 'front_boilerplate'. Kept sections are packed into chunks of
+    up to `chunk_size` tokens, cut on section boundaries; a section larger
+    than that is split into overlapping windows.
+
+    Papers without recognisable headings are kept whole as 'front', with no
+    lines filtered out.
+
+    Example usage:
+        chunker = SectionChunker(sections=['abstract', 'results', 'discussion'])
+        scanner = PMCScanner(logger, cfg, chunker=chunker)
+        ...
+        print(scanner.section_report)
+    """
+    def __init__(self, sections: Union[Iterable[str], None]=None,
+                 edge_lines: int=3, repeat_fraction: float=.3, min_repeats: int=3,
+                 front_lines: int=40):
+        self.sections = set(sections) if sections is not None else set(DEFAULT_SECTIONS)
+        unknown = self.sections - set(SECTION_HEADINGS) - {'front'}
+        if unknown:
+            raise ValueError(f'unknown sections: {sorted(unknown)}')
+        self.edge_lines = edge_lines
+        self.repeat_fraction = repeat_fraction
+        self.min_repeats = min_repeats
+        self.front_lines = front_lines
+
+    @staticmethod
+    def _normalize(line: str) -> str:
+        # page numbers and dates vary from page to page in otherwise identical lines
+        return re.sub(r'\d+', '#', ' '.join(line.lower().split()))
+
+    def strip_headers(self, pages: List[str]) -> List[str]:
+        """
+        Removes page numbers and lines that recur among the first or last
+        `edge_lines` lines of at least `min_repeats` pages and
+        `repeat_fraction` of all pages.
+        """
+        page_lines = [page.splitlines() for page in pages]
+
+        def edges(lines):
+            n = self.edge_lines
+            if len(lines) <= 2 * n:
+                return range(len(lines))
+            return [*range(n), *range(len(lines) - n, len(lines))]
+
+        seen = Counter()
+        for lines in page_lines:
+            seen.update({self._normalize(lines[i]) for i in edges(lines) if lines[i].strip()})
+        min_count = max(self.min_repeats, self.repeat_fraction * len(pages))
+        repeated = {line for line, count in seen.items() if count >= min_count}
+
+        stripped = []
+        for lines in page_lines:
+            drop = {i for i in edges(lines)
+                    if self._normalize(lines[i]) in repeated
+                    or PAGE_NUMBER_PATTERN.match(lines[i].strip())}
+            stripped.append('\n'.join(line for i, line in enumerate(lines) if i not in drop))
+        return stripped
+
+    @staticmethod
+    def heading(line: str) -> Union[str, None]:
+        """The canonical section a heading line opens, or None."""
+        match = HEADING_PATTERN.match(line.strip())
+        if match is None:
+            return None
+        return HEADING_SECTIONS.get(' '.join(match.group(1).lower().split()))
+
+    def split(self, pages: List[str]) -> List[Tuple[str, str]]:
+        """
+        Strips headers and footers and splits the text into (section, text)
+        pairs in document order. Section text starts with its heading line.
+        Boilerplate lines removed from the front matter come first, as
+        'front_boilerplate'.
+        """
+        sections, name, lines = [], 'front', []
+        for line in '\n'.join(self.strip_headers(pages)).splitlines():
+            section = self.heading(line)
+            if section is not None and section != name:
+                sections.append((name, lines))
+                name, lines = section, []
+            lines.append(line)
+        sections.append((name, lines))
+
+        # without a heading, 'front' is the whole paper and must not be filtered
+        if len(sections) > 1:
+            front = sections[0][1]
+            head, tail = front[:self.front_lines], front[self.front_lines:]
+            boilerplate = [line for line in head if FRONT_BOILERPLATE_PATTERN.search(line)]
+            sections[0] = ('front', [line for line in head
+                                     if not FRONT_BOILERPLATE_PATTERN.search(line)] + tail)
+            sections.insert(0, ('front_boilerplate', boilerplate))
+
+        return [(name, '\n'.join(lines)) for name, lines in sections if ''.join(lines).strip()]
+
+    def chunk(self, pages: List[str], chunk_size: int=2048*8,
+              overlap: int=2048*4) -> Tuple[List[str], Dict]:
+        """
+        Splits a paper's pages into chunks of the selected sections.
+
+        Returns:
+            list: Text chunks, in document order
+            dict: 'tokens' of the raw text, 'tokens_kept' in the chunks and
+                  the kept and dropped tokens per section
+        """
+        report = {'tokens': count_tokens(''.join(pages)), 'tokens_kept': 0,
+                  'kept': Counter(), 'dropped': Counter()}
+
+        chunks, chunk, size = [], [], 0
+        for name, text in self.split(pages):
+            tokens = count_tokens(text)
+            if name not in self.sections:
+                report['dropped'][name] += tokens
+                continue
+
+            report['kept'][name] += tokens
+            report['tokens_kept'] += tokens
+            if chunk and size + tokens > chunk_size:
+                chunks.append('\n'.join(chunk))
+                chunk, size = [], 0
+            if tokens > chunk_size:
+                chunks.extend(chunk_text(text, chunk_size=chunk_size, overlap=overlap))
+            else:
+                chunk.append(text)
+                size += tokens
+
+        if chunk:
+            chunks.append('\n'.join(chunk))
+        return chunks, report
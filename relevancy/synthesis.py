@@ -0,0 +1,104 @@
+import asyncio
+import logging
+from prompts import CHUNK_MERGE_2
+import re
+from typing import Awaitable, Callable, Dict, List, Optional, Union
+
+PDF_CITATION = re.compile(r'\b[\w.-]+\.pdf\b')
+
+def merge_messages(texts: List[str]) -> List[Dict]:
+    """Default reduce prompt: `CHUNK_MERGE_2`, which keeps PDF-id citations."""
+    return [{'role': 'user', 'content': CHUNK_MERGE_2.format(CHUNKS='\n\n'.join(texts))}]
+
+
+class HierarchicalSynthesizer:
+    """
+    Map-reduce synthesis for answer sets too large for one prompt. Texts are
+    packed in order into groups of at most `max_group_tokens`, every group is
+    summarised concurrently, and the summaries are grouped and summarised
+    again level by level until a single summary remains.
+
+    Citations of the form "<id>.pdf" that appear in a group's inputs but not
+    in its summary are appended to the summary, so no source is lost on the
+    way up the tree.
+
+    Example usage:
+        async def complete(messages):
+            response = await scanner._acomplete(model=cfg.openai_model,
+                                                messages=messages, temperature=0.0)
+            return response.choices[0].message.content
+
+        synthesizer = HierarchicalSynthesizer(complete, max_group_tokens=8192)
+        summary = await synthesizer.asynthesize_papers({'11437462.pdf': '...', ...})
+    """
+    def __init__(self, complete: Callable[[List[Dict]], Awaitable[Optional[str]]],
+                 build_messages: Callable[[List[str]], List[Dict]]=merge_messages,
+                 max_group_tokens: int=8192,
+                 count_tokens: Union[Callable[[str], int], None]=None,
+                 logger: Union[logging.Logger, None]=None):
+        self.complete = complete
+        self.build_messages = build_messages
+        self.max_group_tokens = max_group_tokens
+        if count_tokens is None:
+            from chunking import count_tokens
+        self.count_tokens = count_tokens
+        self.logger = logger if logger is not None else logging.getLogger('litscan')
+
+    def group(self, texts: List[str]) -> List[List[str]]:
+        """
+        Packs texts in order into token-bounded groups. A group always takes
+        at least two texts, even past the bound, so every level shrinks.
+        """
+        groups, group, size = [], [], 0
+        for text in texts:
+            tokens = self.count_tokens(text)
+            if len(group) > 1 and size + tokens > self.max_group_tokens:
+                groups.append(group)
+                group, size = [], 0
+            group.append(text)
+            size += tokens
+
+        if group:
+            groups.append(group)
+        return groups
+
+    async def _reduce(self, group: List[str]) -> str:
+        if len(group) == 1:
+            return group[0]
+
+        try:
+            summary = await self.complete(self.build_messages(group))
+        except Exception as e:
+            self.logger.warn(f'Error synthesizing group of {len(group)}: {e}')
+            summary = None
+        if not summary:
+            return '\n\n'.join(group)
+
+        cited = dict.fromkeys(citation for text in group for citation in PDF_CITATION.findall(text))
+        missing = [citation for citation in cited if citation not in summary]
+        if missing:
+            summary += f' ({", ".join(missing)})'
+        return summary
+
+    async def asynthesize(self, texts: List[str]) -> Optional[str]:
+        """Reduces texts to a single summary."""
+        texts = [text for text in texts if text]
+        if not texts:
+            return None
+
+        level = 0
+        while len(texts) > 1:
+            groups = self.group(texts)
+            self.logger.info(f'synthesis level {level}: {len(texts)} texts in {len(groups)} groups')
+            texts = await asyncio.gather(*[self._reduce(group) for group in groups])
+            level += 1
+
+        return texts[0]
+
+    async def asynthesize_papers(self, summaries: Dict[str, str]) -> Optional[str]:
+        """
+        Condenses per-paper summaries keyed by PDF filename (e.g.
+        '11437462.pdf') into one summary citing the PDFs inline.
+        """
+        return await self.asynthesize([f'{summary} ({pdf_id})'
+                                       for pdf_id, summary in summaries.items() if summary])